@@ -31,6 +31,7 @@ from limelights.basetypes import randmins, Color
 from limelights.model import (Building, Space, Room, HotelRoom, Fireplace,
                               Stairwell, CandleRoom)
 from limelights.animations import on, off, tv, limit, candle
+from limelights.output import Correction
 
 class Flat(Space):
     """
@@ -62,9 +63,9 @@ class Flat(Space):
         for room in kw.values():
             self.append(room)
 
-        # The livingroom leads. It sets the animations property of
-        # the bedroom source.
-        self.livingroom.source.animations = self.livingroom_animations
+        # The livingroom leads. It sends the bedroom source its
+        # animations.
+        self.livingroom.source.send(self.livingroom_animations)
 
     def livingroom_animations(self):
         # These are for the dependent (bedroom) source.
@@ -80,7 +81,7 @@ class Flat(Space):
 
         # There is a .3 change of someone being at home by default.
         # Turn the bedroom lights off. (Not needed, I think.)
-        self.bedroom.source.animations = off_
+        self.bedroom.source.send(off_)
         if random.random() >= self.athome:
             if random.random() > .5: # Watch TV?
                 yield limit(tv(), randmins(15, 35))
@@ -88,11 +89,11 @@ class Flat(Space):
                 yield limit(self.livingroom.on(), randmins(25, 45))
 
             # It takes about 10min to go to bed, I guess.
-            self.bedroom.source.animations = self.bedroom.animations
+            self.bedroom.source.send(self.bedroom.animations)
             yield limit(self.livingroom.on(), randmins(7, 12))
 
             if random.random() > .5: # This factor might vary with age.
-                self.bedroom.source.animations = candle_
+                self.bedroom.source.send(candle_)
 
             # Turn the living room lights off.
             # The minumum here must be >= the maximum of the candle,
@@ -122,7 +123,8 @@ class VictorsRoom(Room):
         # The default constructor will do for Victor’s room.
         # The color is a white even bluer thant the default of that
         # Pixel I glued there.
-        super().__init__(name, color=Color(0xeeffee).darker(1.2))
+        super().__init__(name, color=0xeeffee,
+                         correction=Correction(brightness=1.2))
 
     def animations(self):
         if random.random() < .8:
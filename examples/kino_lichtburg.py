@@ -5,6 +5,7 @@ from limelights.basetypes import Color
 from limelights.model import (Building, Space, Room, HotelRoom, Fireplace,
                               Stairwell, Attic)
 from limelights.animations import on, off, tv, limit, candle, darker
+from limelights.output import Correction
 
 def rflicker(color:Color, a:float, b:float):
     """
@@ -74,7 +75,10 @@ warmwhite = Color(0x553311)
 Appliance = Room
 CeilingLamp = Room
 
-warmwhite = Color.from_temperature(3000).darker(.85)
+warmwhite = Color.from_temperature(3000)
+
+# The warm white rooms’ brightness.
+warm = Correction(brightness=.85)
 
 lichtburg = Building(
     # Wer weiß, was "LSTB" heißt? ;-)
@@ -89,38 +93,39 @@ lichtburg = Building(
 
           # The Lobby's main source of light. This must not be too bright as not to blot out the
           # other lights.
-          CeilingLamp(lightnum=6, color=Color.from_temperature(2400).darker(.6))),
+          CeilingLamp(lightnum=6, color=Color.from_temperature(2400),
+                      correction=Correction(brightness=.6))),
 
     # The Box Office.
-    Room("Box Office", color=Color(0x884488).darker(.1)),
+    Room("Box Office", color=0x884488, correction=Correction(brightness=.1)),
 
     Room("Entrance", lightnum=4, color=0xf06518),
 
-    Room("First Floor Right", color=warmwhite),
-    Room("First Floor Middle", color=warmwhite),
-    Room("First Floor Left", color=warmwhite),
+    Room("First Floor Right", color=warmwhite, correction=warm),
+    Room("First Floor Middle", color=warmwhite, correction=warm),
+    Room("First Floor Left", color=warmwhite, correction=warm),
 
-    Room("Second Floor Left", color=warmwhite),
-    Room("Second Floor Middle", color=warmwhite),
-    Room("Second Floor Right", color=warmwhite),
+    Room("Second Floor Left", color=warmwhite, correction=warm),
+    Room("Second Floor Middle", color=warmwhite, correction=warm),
+    Room("Second Floor Right", color=warmwhite, correction=warm),
 
-    Room("Third Floor Right", color=warmwhite),
-    Room("Third Floor Middle", color=warmwhite),
-    Room("Third Floor Left", color=warmwhite),
+    Room("Third Floor Right", color=warmwhite, correction=warm),
+    Room("Third Floor Middle", color=warmwhite, correction=warm),
+    Room("Third Floor Left", color=warmwhite, correction=warm),
 
     # Backside
-    Room("Third Floor Left (from the back)", color=warmwhite),
-    Room("Third Floor Middle (from the back)", color=warmwhite),
-    Room("Third Floor Bathroom (from the back)", color=warmwhite),
+    Room("Third Floor Left (from the back)", color=warmwhite, correction=warm),
+    Room("Third Floor Middle (from the back)", color=warmwhite, correction=warm),
+    Room("Third Floor Bathroom (from the back)", color=warmwhite, correction=warm),
 
     Stairwell("Stairwell", lightnum=3),
 
-    Room("Fourth Floor Right (from the back)", color=warmwhite),
-    Room("Fourth Floor Middle (from the back)", color=warmwhite),
-    Room("Fourth Floor Bathroom (from the back)", color=warmwhite),
+    Room("Fourth Floor Right (from the back)", color=warmwhite, correction=warm),
+    Room("Fourth Floor Middle (from the back)", color=warmwhite, correction=warm),
+    Room("Fourth Floor Bathroom (from the back)", color=warmwhite, correction=warm),
 
 
-    Room("Second Floor Left (from the back)", color=warmwhite),
+    Room("Second Floor Left (from the back)", color=warmwhite, correction=warm),
 
     # The second floor back windows (which have very pretty curtains in them!) are hidden
     # by the movie theater's lower seats (and emergancy exists) and the projectionist's booth.
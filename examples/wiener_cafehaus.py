@@ -7,25 +7,27 @@ from limelights.basetypes import randmins, randsecs, Color
 from limelights.model import (Building, Space, Room,
                               Stairwell, CandleRoom, EndMarker)
 from limelights.animations import on, off, tv, limit, candle, darker
+from limelights.output import Correction
 
 warmwhite = Color(0x553311)
-officelamp = Color(0xffeedd).darker(.75)
+officelamp = Color(0xffeedd)
 
 
 class Room(Room):
     """
     All the rooms in my Wiener Cafehaus need to be dimmed by half
     because the plastic walls are so thin I didn't know yet that painting
-    them black from the back side would help.
+    them black from the back side would help. The calibration stage
+    takes care of that, `brightness` is the room’s own factor on top.
     """
-    def __init__(self, *lights, lightnum=1, color=0xffffff):
-        super().__init__(*lights, lightnum=lightnum,
-                         color=Color(color).darker(.75))
+    def __init__(self, *lights, lightnum=1, color=0xffffff, brightness=1.0):
+        super().__init__(*lights, lightnum=lightnum, color=color,
+                         correction=Correction(brightness=.75*brightness))
 
 class Bakery(Room):
     def __init__(self, *lights, lightnum=1):
-        super().__init__(*lights, lightnum=lightnum,
-                         color=Color(0xdddddd).darker(1.8))
+        super().__init__(*lights, lightnum=lightnum, color=0xdddddd,
+                         brightness=1.8)
 
 class Flat(Space):
     pass
@@ -37,8 +39,9 @@ class Restaurant(Room):
     # pleasing, I think.
     # The lights in the restaurant are constantly on. There are constantly
     # model people in there so we won’t leave them in the dark.
-    def __init__(self, *lights, lightnum=1, color=warmwhite):
-        super().__init__(*lights, lightnum=lightnum, color=color.darker(.32))
+    def __init__(self, *lights, lightnum=1, color=warmwhite, brightness=1.0):
+        super().__init__(*lights, lightnum=lightnum, color=color,
+                         brightness=.32*brightness)
 
 class Office(Space):
     # At a later time there might be office hours. Right now the staff is
@@ -54,10 +57,13 @@ class StudentAppartment(Room):
     def __init__(self, *lights, lightnum=1):
         super().__init__(*lights, lightnum=lightnum)
 
+        # These don’t get the thin walls’ correction.
         if random() > .8:
-            self._color=warmwhite.darker(.5)
+            self._color=warmwhite
+            self.correction = Correction(brightness=.5)
         else:
-            self._color=Color(0xffbbbb).darker(.25)
+            self._color=Color(0xffbbbb)
+            self.correction = Correction(brightness=.25)
 
     def animations(self):
         r = random()
@@ -91,8 +97,11 @@ class Flashlight(Room):
 
 # The flat’s room are not interdependent.
 class Bedroom(Room):
-    def __init__(self, *lights, lightnum=1, color=warmwhite):
-        super().__init__(*lights, lightnum=lightnum, color=color.darker(.33))
+    precompile = True
+
+    def __init__(self, *lights, lightnum=1, color=warmwhite, brightness=1.0):
+        super().__init__(*lights, lightnum=lightnum, color=color,
+                         brightness=.33*brightness)
 
     def animations(self):
         # You spend about a third of the day in bed, right? Right??
@@ -105,9 +114,11 @@ class Bedroom(Room):
             yield self.off()
 
 class Kitchen(Room):
+    precompile = True
+
     def __init__(self, *lights, lightnum=1):
-        super().__init__(*lights, lightnum=lightnum,
-                         color=Color(0xffeeee).darker(.25))
+        super().__init__(*lights, lightnum=lightnum, color=0xffeeee,
+                         brightness=.25)
 
     def animations(self):
         # Takes about 45–90mins to cook a decent meal.
@@ -118,7 +129,8 @@ class Kitchen(Room):
 
 class Livingroom(Room):
     def __init__(self, *lights, lightnum=1, color=warmwhite):
-        super().__init__(*lights, lightnum=lightnum, color=color.darker(1/1.6))
+        super().__init__(*lights, lightnum=lightnum, color=color,
+                         brightness=1/1.6)
 
     def animations(self):
         r = random()
@@ -135,14 +147,14 @@ wiener_cafehaus = Building(
     # Vissmann/Volmer 43618 H0 Wiener Kaffeehaus
     # https://viessmann-modell.com/spur-h0/gebaeude/stadt/1194h0-wiener-kaffeehaus/43618
 
-    Flat( Bedroom("Fourth Floor Back right", color=warmwhite.darker(1/1.6)),
+    Flat( Bedroom("Fourth Floor Back right", brightness=1/1.6),
           Bedroom("Fourth Floor Front right"),
           Livingroom("Fourth Floor Front center"),
           Bedroom("Fourth Floor Front left"),
           Kitchen("Fourth Floor Back left")),
 
-    Room("Fotostudio", lightnum=2, color=warmwhite.darker(1/1.5)),
-    Room("Fotostudio Backroom", lightnum=3, color=warmwhite.darker(.5)),
+    Room("Fotostudio", lightnum=2, color=warmwhite, brightness=1/1.5),
+    Room("Fotostudio Backroom", lightnum=3, color=warmwhite, brightness=.5),
     Flashlight("Flashlight!"),
 
     # The third floor has offices in the front rooms.
@@ -152,9 +164,12 @@ wiener_cafehaus = Building(
     # The two back rooms are rented out as single bedroom appartments
     # to students at the local university, see above.
     StudentAppartment("Third Floor Back left"),
-    Office( Room("Third Floor Front right", color=officelamp),
-            Room("Third Floor Front center", color=warmwhite.darker(1/2.5)),
-            Room("Third Floor Front left", color=officelamp)),
+    Office( Room("Third Floor Front right", color=officelamp,
+                 brightness=.75),
+            Room("Third Floor Front center", color=warmwhite,
+                 brightness=1/2.5),
+            Room("Third Floor Front left", color=officelamp,
+                 brightness=.75)),
     StudentAppartment("Third Floor Back right"),
 
     StudentAppartment("Second Floor Back left"),
@@ -1,11 +1,25 @@
-import dataclasses
-import icecream
-icecream.install()
+import builtins
+
+# icecream takes a while to import (it brings pygments and friends),
+# so ic() imports it on first use only.
+if not hasattr(builtins, "ic"):
+    def ic(*args):
+        import icecream
+        icecream.install()
+        return builtins.ic(*args)
+    builtins.ic = ic
 
-@dataclasses.dataclass
 class Config(object):
     framerate = 24
     speed = 1
     debug = False
 
+    # The number of frames tv() and candle() hold each of their
+    # flickering colors, see limelights.quality.
+    flicker = 1
+
+    # The number of frames each computed frame stands for, see
+    # Engine.stride.
+    stride = 1
+
 config = Config()
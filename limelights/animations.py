@@ -1,9 +1,11 @@
 from random import randint, random
 from itertools import repeat
+from functools import wraps
 from typing import Generator
 
 from . import config
 from .basetypes import Animation, Change, Time, Color, RDuration
+from .compositing import TRANSPARENT
 
 def limit(animation:Animation, duration:Time|RDuration) -> Animation:
     if isinstance(duration, RDuration):
@@ -14,11 +16,17 @@ def limit(animation:Animation, duration:Time|RDuration) -> Animation:
     if config.speed != 1:
         time = int(time/config.speed)
 
+    if time <= 0:
+        # No limit.
+        yield from animation
+        return
+
+    # Each frame computed stands for config.stride frames.
     for change in animation:
         yield change
 
-        time -= 1
-        if time == 0:
+        time -= config.stride
+        if time <= 0:
             break
 
 def no_more_changes():
@@ -26,6 +34,7 @@ def no_more_changes():
         yield None
 
 def perpetual(f):
+    @wraps(f)
     def wrapper(*args, **kw):
         yield from f(*args, **kw)
         yield from no_more_changes()
@@ -33,6 +42,7 @@ def perpetual(f):
     return wrapper
 
 def repeats(f):
+    @wraps(f)
     def wrapper(*args, **kw):
         while True:
             yield from f(*args, **kw)
@@ -54,6 +64,13 @@ def on(color):
 def off():
     yield 0
 
+@perpetual
+def transparent():
+    """
+    Let the layers below show through.
+    """
+    yield TRANSPARENT
+
 def rduration(a:float, b:float):
     """
     “a” and “b” are floats denoting seconds.
@@ -66,7 +83,7 @@ def rwait(a:float, b:float):
     """
     “a” and “b” are floats denoting seconds.
     """
-    yield from repeat(None, rduration(a, b))
+    yield from repeat(None, rduration(a, b) // config.stride)
 
 
 def tv():
@@ -93,7 +110,9 @@ def tv():
 
         yield from rwait(.2, .8)
 
-        for a in range(randint(10, 25)):
+        # With a coarser flicker there are fewer, longer cuts.
+        step = config.flicker
+        for a in range(max(1, randint(10, 25) // step)):
             # Make a number of small, quick changes emulating cuts
             # within a sequence.
             R = limit(r + randint(-smalldiff, smalldiff))
@@ -102,7 +121,7 @@ def tv():
 
             yield Color.from_rgb(R, G, B)
 
-            yield from rwait(.2, .8)
+            yield from rwait(.2 * step, .8 * step)
 
 def candle():
     baselight = Color(0xff8800).darker(.2)
@@ -110,10 +129,15 @@ def candle():
     while True:
         yield baselight
 
+        # Each flickering color is held for `step` frames.
+        step = config.flicker
+
         for a in range(randint(3, 6)):
             # Flicker a little
-            for b in range(3):
+            for b in range(max(1, 3 // step)):
                 yield baselight.darker(1/randint(3,8))
+                if step > 1:
+                    yield from repeat(None, step - 1)
 
             # Stick to a color for a while.
             yield baselight.darker(1/randint(2,4))
@@ -121,5 +145,7 @@ def candle():
 
 
         # Flicker more!
-        for a in range(randint(5, 9)):
+        for a in range(max(1, randint(5, 9) // step)):
             yield baselight.darker(1/randint(3,8))
+            if step > 1:
+                yield from repeat(None, step - 1)
@@ -1,4 +1,5 @@
-from .animation import Animation, Animations, AnimationsFunction, Change, Changes
+from .animation import (Animation, Animations, AnimationsFunction,
+                        Change, Changes, LayerChange)
 from .color import Color
 from .time import Time, Duration, RDuration, randmins, randsecs
 from .objects import Light, Lights, Lamp, NameableLights
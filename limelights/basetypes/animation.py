@@ -7,6 +7,13 @@ Animations = Generator[Animation, None, None]
 AnimationsFunction = Callable[[None], Animations]
 
 class Change(dict):
+    # LayerChanges collected from the things a Changes was made of.
+    layers = ()
+
+    # An array with the colors of all pixels if this Change rewrites
+    # the whole frame.
+    frame = None
+
     def __init__(self, idx:int, color:Color):
         super().__init__()
         self[idx] = color
@@ -20,20 +27,68 @@ class Change(dict):
     def __repr__(self):
         return "Change" + super().__repr__()
 
+    def runs(self) -> list:
+        """
+        Return a ( first index, [ colors ], ) tuple for each run of
+        consecutive pixels in this Change.
+        """
+        ret = []
+        last = None
+        for idx in sorted(self.keys()):
+            if idx == last:
+                colors.append(self[idx])
+            else:
+                colors = [ self[idx] ]
+                ret.append( (idx, colors,) )
+            last = idx + 1
+        return ret
+
     def apply_to(self, strip):
+        # Strip backends take a frame at once, see limelights.strips.
+        if hasattr(strip, "write_ranges"):
+            if self.frame is not None:
+                strip.write_frame(self.frame)
+            elif not strip.ranges:
+                strip.write_pixels(self.items())
+            elif self:
+                strip.write_ranges(self.runs())
+            return
+
         try:
             for idx, color in self.items():
                 strip[idx] = color
         except TypeError:
             raise TypeError(repr(color))
 
+class LayerChange(object):
+    """
+    A Change made by a Source on a layer above the base layer. It
+    is not merged into the frame’s Changes but composited with the
+    pixels’ other layers by the Engine.
+    """
+    def __init__(self, source, change:Change):
+        self.source = source
+        self.change = change
+
+    def __repr__(self):
+        return f"LayerChange({self.source.layer}, {self.change!r})"
+
 class Changes(Change):
     def __init__(self, things):
         for thing in things:
-            if thing:
+            if thing is not None:
                 if isinstance(thing, Change):
                     self.update(thing)
+                    if thing.layers:
+                        self._add_layers(thing.layers)
+                elif isinstance(thing, LayerChange):
+                    self._add_layers((thing,))
                 elif type(thing) == types.GeneratorType:
                     self.update(Changes(thing))
                 else:
                     raise TypeError(type(thing))
+
+    def _add_layers(self, layers):
+        if not self.layers:
+            self.layers = []
+        self.layers.extend(layers)
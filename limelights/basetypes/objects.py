@@ -1,6 +1,5 @@
 from .animation import Change, Changes
 from .color import Color
-from termcolor import colored
 
 class Light(object):
     """
@@ -36,6 +35,23 @@ class Lights(list):
 
 
 
+    def path_to(self, idx):
+        """
+        Return the list of nested Lights from this one down to the
+        innermost one controlling pixel `idx` or None if `idx` is not
+        among our indeces.
+        """
+        if idx not in self.indeces:
+            return None
+
+        for item in self:
+            if isinstance(item, Lights):
+                path = item.path_to(idx)
+                if path:
+                    return [self] + path
+
+        return [self]
+
     def print_items(self, strip=None, level=0):
         print(level*"  " + self._info() + (self._colorinfo(strip) or ""))
 
@@ -65,6 +81,9 @@ class Lights(list):
 
     def _colorinfo(self, strip):
         if strip:
+            # Only needed for debug output.
+            from termcolor import colored
+
             ids = sorted(list(self.indeces))
             def color(i):
                 c = Color(strip[i])
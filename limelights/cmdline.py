@@ -1,46 +1,25 @@
 #!/usr/bin/env python3
 
-import sys, argparse, time, re, importlib, pathlib, os, pwd, grp
+import sys, argparse, time, re, importlib, pathlib, os, pwd, grp, signal
+import atexit, shlex
 import importlib.machinery
 import importlib.util
 
-try:
-    from rpi_ws281x import PixelStrip as RealPixelStrip
-except ImportError:
-    pass
-
 from . import config
 from . engine import Engine
 from .basetypes import Time, Changes
 from .model import Building, Town, Source, Light, EndMarker
+from .utils import clear, home
 
-class DebugPixelStrip(dict):
-    def __init__(self, *args, **kw):
-        # We ignore all the parameters.
-        super().__init__()
-        self.outfile = sys.stdout
-        self.now = Time(0)
-
-    def begin(self):
-        pass
-
-    def print(self, *args, **kw):
-        kw["file"] = self.outfile
-        print(*args, **kw)
-
-    def __len__(self):
-        return max(self.keys()) + 1
-
-    @property
-    def size(self):
-        return len(self)
-
-    def show(self):
-        """
-        This is going to print out our contents to stdout.
-        """
-        pass
+# The optional subsystems are imported by the commands and options
+# that use them, so a start only pays for what it runs.
 
+def __getattr__(name):
+    # DebugPixelStrip used to live here, see limelights.strips.
+    if name == "DebugPixelStrip":
+        from .strips import DebugPixelStrip
+        return DebugPixelStrip
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def parse_int(s):
     if s.startswith("0x"):
@@ -48,6 +27,12 @@ def parse_int(s):
     else:
         return int(s)
 
+def parse_factors(s):
+    ret = tuple([ float(f) for f in s.split(",") ])
+    if len(ret) != 3:
+        raise ValueError("Need three comma separated factors.")
+    return ret
+
 range_re = re.compile(r"(\d+)[-–](\d+)|(\d+)")
 def parse_number_range(r):
     match = range_re.match(r)
@@ -77,7 +62,12 @@ def load_module_from_file(filepath):
 
     return module
 
+# The channel orders rpi_ws281x knows.
+strip_types = ( "RGB", "RBG", "GRB", "GBR", "BRG", "BGR", )
+
 def populate_with_strip_arguments(parser):
+    from .strips import backends
+
     parser.add_argument("-g", "--gpio", help="GPIO pin connected to the pixels"
                         "18 uses PWM, 10 uses SPI /dev/spidev0.0, 21 uses PCM",
                         default=18, type=int)
@@ -95,12 +85,24 @@ def populate_with_strip_arguments(parser):
                         default=None, type=int)
     parser.add_argument("--debug-strip", help="Use the virtual PixelStrip "
                         "for debuging.", action="store_true", default=False)
+    parser.add_argument("--strip-type", help="Channel order rpi_ws281x "
+                        "sends the colors in, e.g. GRB. Defaults to "
+                        "rpi_ws281x’s default.",
+                        choices=strip_types, default=None)
+    parser.add_argument("--strip", help="Strip backend, one of "
+                        + ", ".join(sorted(backends)) + ". Defaults to "
+                        "ws281x if rpi_ws281x is installed.",
+                        choices=sorted(backends), default=None)
 
 def construct_strip(args, size):
-    if args.debug_strip or "RealPixelStrip" not in globals():
+    from .strips import backends, DebugPixelStrip
+
+    if args.strip is not None:
+        PixelStrip = backends[args.strip]
+    elif args.debug_strip or "ws281x" not in backends:
         PixelStrip = DebugPixelStrip
     else:
-        PixelStrip = RealPixelStrip
+        PixelStrip = backends["ws281x"]
 
     if args.channel is None:
         channel = 0
@@ -113,9 +115,13 @@ def construct_strip(args, size):
         if os.getuid() != 0:
             raise OSError("We need root access to manipulate the lights on GPIO 18.")
 
+    kw = {}
+    if args.strip_type is not None:
+        kw["strip_type"] = args.strip_type
+
     strip = PixelStrip(size,
                        args.gpio, args.led_freq, args.dma,
-                       args.invert, args.brightness, channel)
+                       args.invert, args.brightness, channel, **kw)
 
     strip.begin()
 
@@ -138,6 +144,8 @@ def load_buildings(modules):
         for identifyer, value in module.__dict__.items():
             if isinstance(value, Building):
                 value.identifyer = identifyer
+                if modulename.endswith(".py"):
+                    value.module_file = modulename
                 yield value
 
 def all_lights(item):
@@ -152,6 +160,69 @@ def all_lights(item):
         raise TypeError(item)
 
 
+def binary_patterns(rooms, color=0xffffff):
+    """
+    Room number n (counting from 1) is lit in step k if bit k of n
+    is set, most significant bit first. Return a list of
+    (legend, Change) tuples for a sync frame with all rooms lit and
+    for each of the steps. Each Change sets all the rooms’ pixels.
+    """
+    on = [ Changes([light.change_to(color) for light in all_lights(room)])
+           for room in rooms ]
+    off = [ Changes([light.change_to(0) for light in all_lights(room)])
+            for room in rooms ]
+
+    def frame(lit):
+        ret = Changes([])
+        for no in range(len(rooms)):
+            if lit(no+1):
+                ret.update(on[no])
+            else:
+                ret.update(off[no])
+        return ret
+
+    bits = len(rooms).bit_length()
+    ret = [ ("sync", frame(lambda n: True),) ]
+    for bit in reversed(range(bits)):
+        ret.append( (f"step {bits-bit}/{bits}: bit {bit} ({1 << bit})",
+                     frame(lambda n: n & (1 << bit)),) )
+
+    return ret, frame(lambda n: False)
+
+def identify_binary(strip, rooms, duration, wait, calibration=None):
+    """
+    Light all the rooms at once in a sequence of binary coded
+    patterns so each room’s number can be decoded from ceil(log2 N)
+    steps. The patterns are corrected by `calibration` if given.
+    """
+    patterns, dark = binary_patterns(rooms)
+    if calibration is not None:
+        patterns = [ ( legend, calibration.process(None, change), )
+                     for legend, change in patterns ]
+        dark = calibration.process(None, dark)
+    bits = len(rooms).bit_length()
+
+    for no, room in enumerate(rooms, 1):
+        print(f"%4i = {no:0{bits}b}" % no, room._info())
+    print()
+
+    for legend, change in patterns:
+        change.apply_to(strip)
+        strip.show()
+        print(legend, end=" ")
+        sys.stdout.flush()
+
+        if wait:
+            print("<ENTER>", end="")
+            input()
+        else:
+            print()
+            time.sleep(duration)
+
+        dark.apply_to(strip)
+        strip.show()
+        time.sleep(duration / 2)
+
 def identify():
     parser = argparse.ArgumentParser(description="Identify room lights "
                                      "by blinking each room’s light(s) twice "
@@ -169,6 +240,12 @@ def identify():
     parser.add_argument("--wait", "-w", help="Wait for key press before "
                         "blinking the next room", action="store_true",
                         default=False)
+    parser.add_argument("--binary", "-B", help="Light all the rooms at once "
+                        "in binary coded patterns, one bit per step, instead "
+                        "of one room after the other.",
+                        action="store_true", default=False)
+    parser.add_argument("--duration", "-d", help="Duration of each step in "
+                        "binary mode in seconds.", type=float, default=2.0)
     parser.add_argument("modules", nargs="+",
                         help="Python modules to import or python files to "
                         "evaluate to load building models")
@@ -181,6 +258,10 @@ def identify():
     strip = construct_strip(args, engine.lightcount)
     strip.begin()
 
+    # The rooms light up as bright as they would in the animation.
+    from .output import town_calibration
+    calibration = town_calibration(town, engine.lightcount)
+
     building = None
     if args.building:
         building = town.building_by_name(args.building)
@@ -191,12 +272,19 @@ def identify():
     def set(item, color):
         change = Changes([light.change_to(color)
                           for light in all_lights(item)])
+        if calibration is not None:
+            change = calibration.process(engine, change)
         change.apply_to(strip)
         strip.show()
 
     # Turn all the lights off.
     set(building, 0)
 
+    if args.binary:
+        identify_binary(strip, building[args.skip:], args.duration, args.wait,
+                        calibration)
+        return
+
     # Ok, let’s do our work here:
     for idx, room in enumerate(building[args.skip:]):
         print(room._info(), end=" ")
@@ -220,6 +308,10 @@ def identify():
 
 
 def animate():
+    from .output import (PowerLimiter, Calibration, Correction, MasterCurve,
+                         parse_curve)
+    from .realtime import policies
+
     parser = argparse.ArgumentParser(description="Run a limelights animation")
 
     populate_with_strip_arguments(parser)
@@ -235,18 +327,95 @@ def animate():
                         help="Print Buildings, rooms, and lights to stdout"
                         "on each frame.",
                         action="store_true", default=False)
+    parser.add_argument("--publish", "-P", help="Publish the framebuffer "
+                        "and frame timing to this file for other programs "
+                        "to read, e.g. /dev/shm/limelights.", default=None)
+    parser.add_argument("--flight-recorder", "-R", help="Keep this many "
+                        "minutes of frames in memory and write them to "
+                        "--flight-log on SIGUSR1 or when an error occurs.",
+                        type=float, default=None)
+    parser.add_argument("--flight-log", help="Output file for the flight "
+                        "recorder.", default="/tmp/limelights-flight.log")
+    parser.add_argument("--profile", help="Measure the time spent on each "
+                        "source’s animations every n-th frame and print a "
+                        "report on exit or SIGUSR2. 1 measures every frame.",
+                        type=int, default=None, metavar="n")
+    parser.add_argument("--profile-top", help="Number of lines per table in "
+                        "the profiler’s report", type=int, default=15)
+    parser.add_argument("--gamma", help="Gamma correction exponent applied "
+                        "to every channel", type=float, default=None)
+    parser.add_argument("--white", help="White balance as three factors for "
+                        "the red, green and blue channels, e.g. 1,.9,.8",
+                        type=parse_factors, default=None)
+    parser.add_argument("--scale", help="Brightness factor applied through "
+                        "the calibration tables", type=float, default=None)
+    parser.add_argument("--order", help="Channel order of the pixels, "
+                        "e.g. GRB", default="RGB")
+    parser.add_argument("--master-curve", help="Brightness and color "
+                        "temperature of the whole town over the day as "
+                        "HH:MM=brightness[/kelvin],… e.g. "
+                        "18:00=1/4000,23:00=.5/2700,06:00=.2. The "
+                        "strip’s hardware brightness, if it has one, "
+                        "dims after gamma correction, see MasterCurve.",
+                        type=parse_curve, default=None)
+    parser.add_argument("--dim", help="Dim the whole town by this factor, "
+                        "e.g. for visitors", type=float, default=None)
+    parser.add_argument("--power-budget", help="Darken the whole frame "
+                        "when the pixels would draw more than this many mA.",
+                        type=float, default=None)
+    parser.add_argument("--channel-current", help="mA a pixel draws per "
+                        "color channel at full brightness",
+                        type=float, default=20.0)
+    parser.add_argument("--idle-current", help="mA a dark pixel draws",
+                        type=float, default=1.0)
+    parser.add_argument("--realtime", help="Run with the SCHED_FIFO or "
+                        "SCHED_RR real-time scheduling policy",
+                        choices=sorted(policies.keys()), default=None)
+    parser.add_argument("--priority", help="Real-time priority 1–99",
+                        type=int, default=50)
+    parser.add_argument("--cpus", help="Pin the animation to these CPUs, "
+                        "e.g. 2-3", type=parse_number_ranges, default=None)
+    parser.add_argument("--mlock", help="Lock all memory into RAM",
+                        action="store_true", default=False)
     parser.add_argument("--end-marker", "-E",
                         help="Append no EndMarker, an extra "
                         "pixel colorfully blinking to test electrical "
                         "connectivity.",
                         action="store_false", default=True)
+    parser.add_argument("--watch", "-w", help="Reload building module "
+                        "files when they change and swap in their Buildings "
+                        "if their pixel layout is still the same.",
+                        action="store_true", default=False)
+    parser.add_argument("--timeline", help="Precompile the animations of "
+                        "schedule-like rooms this many hours ahead instead "
+                        "of running them frame by frame.", type=float,
+                        default=None, metavar="hours")
+    parser.add_argument("--hours", help="Animate a building only during "
+                        "these hours, e.g. kino_lichtburg=17:00-23:30. "
+                        "Overrides the Building’s hours=. May be repeated.",
+                        action="append", default=[], metavar="NAME=HOURS")
+    parser.add_argument("--keep-state", help="Continue a building’s "
+                        "animations where they were suspended rather than "
+                        "starting over when its hours begin.",
+                        action="store_true", default=False)
+    parser.add_argument("--control", "-C", help="Listen for commands on "
+                        "this Unix socket, see bin/control.", default=None)
+    parser.add_argument("--adaptive", "-A", help="Lower the quality step by "
+                        "step when frames take longer than this share of "
+                        "the frame time, see limelights.quality.",
+                        type=float, default=None, metavar="LOAD")
     parser.add_argument("modules", nargs="+",
                         help="Python modules to import or python files to "
                         "evaluate to load building models")
 
     args = parser.parse_args()
 
-    if args.debug or "RealPixelStrip" not in globals():
+    if args.order.upper() != "RGB" and args.strip_type is not None:
+        parser.error("--order would swap the channels again after "
+                     "--strip-type did.")
+
+    from .strips import backends
+    if args.debug or ( args.strip is None and "ws281x" not in backends ):
         args.debug = True
 
     config.framerate = args.framerate
@@ -258,18 +427,532 @@ def animate():
         town.append(EndMarker())
     engine = Engine(town, args.offset)
 
+    if args.publish:
+        from .sharedmem import FramebufferPublisher
+        FramebufferPublisher(args.publish, engine.lightcount).install(engine)
+
+    if args.master_curve or args.dim:
+        engine.output_stages.append(
+            MasterCurve(engine.lightcount,
+                        args.master_curve or [ (0, 1.0, None,), ],
+                        args.dim or 1.0))
+
+    calibration = Calibration(engine.lightcount,
+                              Correction(args.gamma, args.white, args.scale),
+                              args.order)
+    if ( calibration.install(town)
+         or args.gamma or args.white or args.scale or args.order != "RGB" ):
+        engine.output_stages.append(calibration)
+
+    if args.power_budget:
+        engine.output_stages.append(PowerLimiter(engine.lightcount,
+                                                 args.power_budget,
+                                                 args.channel_current,
+                                                 args.idle_current))
+
+    if args.timeline:
+        from .timeline import Timeline
+        Timeline(engine, args.timeline).install()
+
+    for spec in args.hours:
+        name, hours = spec.split("=", 1)
+        building = town.building_by_name(name)
+        if building is None:
+            parser.error(f"No such building: {name}")
+        town.schedule(building, hours)
+
+    # A reloaded Building may come with hours=, see Town.replace().
+    if town.schedules or args.watch:
+        from .schedule import BuildingSchedule
+        BuildingSchedule(engine, args.keep_state).install()
+
+    if args.adaptive:
+        from .quality import QualityController
+        QualityController(engine, args.adaptive).install()
+
+    if args.watch:
+        from .reload import ModuleWatcher
+        ModuleWatcher(engine, calibration=calibration).install()
+
+    recorder = None
+    if args.flight_recorder:
+        from .recorder import FlightRecorder
+        recorder = FlightRecorder(engine.lightcount, args.flight_recorder)
+        engine.observers.append(recorder)
+        signal.signal(signal.SIGUSR1,
+                      lambda signum, frame: recorder.request_dump(
+                          args.flight_log))
+
+    if args.profile:
+        from .profiler import Profiler
+        profiler = Profiler(args.profile, args.profile_top)
+        profiler.install(engine)
+        atexit.register(profiler.report)
+        signal.signal(signal.SIGUSR2,
+                      lambda signum, frame: profiler.request_report())
+
+        # The service is stopped with SIGTERM which would skip the
+        # atexit handlers.
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # These need root privileges which construct_strip() will drop.
+    if args.cpus:
+        from .realtime import pin_to_cpus
+        pin_to_cpus(args.cpus)
+    if args.realtime:
+        from .realtime import set_realtime_priority
+        set_realtime_priority(args.realtime, args.priority)
+    if args.mlock:
+        from .realtime import lock_memory
+        lock_memory()
+
     strip = construct_strip(args, engine.lightcount)
 
+    # Create the socket as the user we run as from now on.
+    if args.control:
+        from .control import ControlServer
+        ControlServer(engine, args.control).install()
+
     # This will not return.
-    engine.animate(strip)
+    try:
+        engine.animate(strip)
+    except Exception:
+        if recorder is not None:
+            recorder.dump(args.flight_log)
+        raise
+
+def golden():
+    parser = argparse.ArgumentParser(description="Compare the frames an "
+                                     "alternative engine shows to those of "
+                                     "the reference engine.")
+    parser.add_argument("--engine", "-e", help="Alternative engine class "
+                        "as “module:Class”",
+                        default="limelights.engine:Engine")
+    parser.add_argument("--reference", "-r", help="Frame journal to compare "
+                        "to instead of running the reference engine.",
+                        default=None)
+    parser.add_argument("--save", help="Save the alternative engine’s frame "
+                        "journal to this file", default=None)
+    parser.add_argument("--seed", help="Random seed", type=int, default=0)
+    parser.add_argument("--strip", help="Strip backend both engines write "
+                        "to: counting takes runs of pixels, debug single "
+                        "pixels.", choices=[ "counting", "debug", ],
+                        default="counting")
+    parser.add_argument("--frames", "-f", help="Number of frames to run",
+                        type=int, default=24*60*60)
+    parser.add_argument("--speed", "-s", help="Animation speed factor",
+                        type=float, default=1.0)
+    parser.add_argument("--framerate", type=int, default=24)
+    parser.add_argument("modules", nargs="+",
+                        help="Python files to evaluate to load building "
+                        "models. Each engine run evaluates them again.")
+
+    args = parser.parse_args()
+
+    from .golden import FrameJournal, record, import_engine, first_difference
+    from .strips import backends
+
+    config.framerate = args.framerate
+    config.speed = args.speed
+    config.debug = False
+
+    def town_factory():
+        return Town(*load_buildings(args.modules))
+
+    strip_class = backends[args.strip]
+    engine, journal = record(import_engine(args.engine), town_factory,
+                             args.seed, args.frames, strip_class)
+    if args.save:
+        journal.save(args.save)
+
+    if args.reference:
+        reference = FrameJournal.load(args.reference)
+    else:
+        engine, reference = record(Engine, town_factory,
+                                   args.seed, args.frames, strip_class)
+
+    difference = first_difference(reference, journal)
+    if difference is None:
+        print(f"{journal.frame_count} frames, no differences.")
+    else:
+        frame, idx, a, b = difference
+        if idx is None:
+            print(f"The journals differ in length: "
+                  f"{reference.frame_count} vs. {journal.frame_count} frames.")
+        else:
+            path = engine.town.path_to(idx) or []
+            where = " / ".join([item._info() for item in path[1:]])
+            def fmt(color):
+                return "unchanged" if color is None else f"{color:06x}"
+            print(f"First difference in frame {frame}, pixel {idx}: "
+                  f"{fmt(a)} (reference) vs. {fmt(b)}")
+            print(where)
+        sys.exit(1)
+
+def flightlog():
+    parser = argparse.ArgumentParser(description="Print per-pixel timelines "
+                                     "from a flight recorder log.")
+    parser.add_argument("path", help="File written by the flight recorder")
+    parser.add_argument("numbers", nargs="*", type=parse_number_ranges,
+                        help="Which pixels to print. Indeces are 0-based. "
+                        "Ranges may be specified using <start>-<end>.")
+
+    args = parser.parse_args()
+
+    from .recorder import FlightLog
+    log = FlightLog(args.path)
+    config.framerate = log.framerate
+
+    indeces = None
+    if args.numbers:
+        indeces = set()
+        for n in args.numbers:
+            indeces |= n
+        indeces = sorted(indeces)
+
+    print(f"{log.frame_count} frames from {Time(log.first_frame)} "
+          f"at {log.framerate} fps")
+    for idx, timeline in log.timelines(indeces).items():
+        print("%4i:" % idx)
+        for frame, color in timeline:
+            print("     ", Time(frame), f"{color:06x}")
+
+def control():
+    parser = argparse.ArgumentParser(description="Send a command to an "
+                                     "animation started with --control.")
+    parser.add_argument("path", help="Socket passed to animate’s --control")
+    parser.add_argument("command", nargs="+", help="speed <factor>, "
+                        "override <name> on|off|<rrggbb>, release <name>|all, "
+                        "identify <name>, colors [<name>] or timing")
+
+    args = parser.parse_args()
+
+    from .control import send
+    reply = send(args.path, shlex.join(args.command))
+    print(reply)
+    if not reply.startswith("ok"):
+        sys.exit(1)
+
+def monitor():
+    parser = argparse.ArgumentParser(description="Show the framebuffer "
+                                     "published by a running animation.")
+    parser.add_argument("--interval", "-i", help="Seconds between updates",
+                        type=float, default=1.0)
+    parser.add_argument("path", help="File passed to animate’s --publish")
+
+    args = parser.parse_args()
+
+    from .sharedmem import FramebufferReader
+    reader = FramebufferReader(args.path)
+
+    clear()
+    while True:
+        frame, timestamp, proctime, frametime, colors = reader.read()
+
+        home()
+        print(Time(frame), "%.4f/%.4f" % (proctime, frametime,))
+        for idx in range(0, len(colors), 8):
+            print("%4i:" % idx, " ".join([f"{c:06x}"
+                                          for c in colors[idx:idx+8]]))
+
+        time.sleep(args.interval)
 
 def list_items():
-    parser = argparse.ArgumentParser(help="Load building modules and list "
-                                     "their subitems.")
+    parser = argparse.ArgumentParser(description="Load building modules and "
+                                     "list their subitems.")
+
+    parser.add_argument("--offset", "-o", help="First light’s ID to be used",
+                        type=int, default=0)
+    parser.add_argument("modules", nargs="+",
+                        help="Python modules to import or python files to "
+                        "evaluate to load building models")
+
+    args = parser.parse_args()
+
+    town = Town(*load_buildings(args.modules))
+    engine = Engine(town, args.offset)
+    town.print_items()
+
+class FrameTimer(object):
+    """
+    Engine observer collecting the processing time of each frame.
+    """
+    def __init__(self):
+        self.proctimes = []
+
+    def frame(self, engine, change, proctime):
+        self.proctimes.append(proctime)
+
+def simulate():
+    parser = argparse.ArgumentParser(description="Simulate a town for a "
+                                     "number of days and report how much of "
+                                     "the time each room is lit, in which "
+                                     "modes and how much energy it uses.")
+    parser.add_argument("--days", "-d", help="Simulated time in days",
+                        type=float, default=30.0)
+    parser.add_argument("--framerate", help="How many times a second"
+                        "the strip’s state is rendered.",
+                        type=int, default=24)
+    parser.add_argument("--speed", "-s", help="Animation speed factor",
+                        type=float, default=1.0)
+    parser.add_argument("--seed", help="Seed for the random number "
+                        "generator", type=int, default=None)
+    parser.add_argument("--channel-current", help="mA a pixel draws per "
+                        "color channel at full brightness",
+                        type=float, default=20.0)
+    parser.add_argument("--idle-current", help="mA a dark pixel draws",
+                        type=float, default=1.0)
+    parser.add_argument("--voltage", help="Supply voltage of the pixels",
+                        type=float, default=5.0)
+    parser.add_argument("modules", nargs="+",
+                        help="Python modules to import or python files to "
+                        "evaluate to load building models")
+
+    args = parser.parse_args()
+
+    config.framerate = args.framerate
+    config.speed = args.speed
+    config.debug = False
+
+    import random
+    from .simulation import Simulation, report
+    from .output import town_calibration
+
+    random.seed(args.seed)
+
+    town = Town(*load_buildings(args.modules))
+    engine = Engine(town)
+    simulation = Simulation(engine, args.channel_current, args.idle_current,
+                            calibration=town_calibration(town,
+                                                         engine.lightcount))
+    simulation.run(int(args.days * 86400 * config.framerate))
+    report(simulation, args.voltage)
+
+def heatmap():
+    parser = argparse.ArgumentParser(description="Simulate a town and draw "
+                                     "its pixels’ colors over time, one row "
+                                     "per pixel, as a PNG or SVG image.")
+    parser.add_argument("--hours", help="Simulated time in hours",
+                        type=float, default=8.0)
+    parser.add_argument("--width", "-W", help="Number of time buckets",
+                        type=int, default=960)
+    parser.add_argument("--row-height", help="Image rows per pixel",
+                        type=int, default=3)
+    parser.add_argument("--start", help="Time of day the simulation starts "
+                        "as HH:MM, used to label the hours", default=None)
+    parser.add_argument("--framerate", help="How many times a second"
+                        "the strip’s state is rendered.",
+                        type=int, default=24)
+    parser.add_argument("--speed", "-s", help="Animation speed factor",
+                        type=float, default=1.0)
+    parser.add_argument("--seed", help="Seed for the random number "
+                        "generator", type=int, default=None)
+    parser.add_argument("--output", "-O", help="Output file, .png or .svg "
+                        "for an image with labels", default="heatmap.svg")
+    parser.add_argument("modules", nargs="+",
+                        help="Python modules to import or python files to "
+                        "evaluate to load building models")
+
+    args = parser.parse_args()
+
+    config.framerate = args.framerate
+    config.speed = args.speed
+    config.debug = False
+
+    import random
+    from .simulation import Simulation
+    from .heatmap import pixel_rows, png, svg
+    from .output import town_calibration
+
+    random.seed(args.seed)
+
+    town = Town(*load_buildings(args.modules))
+    engine = Engine(town)
+    simulation = Simulation(engine, calibration=town_calibration(
+        town, engine.lightcount))
+    simulation.run(int(args.hours * 3600 * config.framerate))
+
+    rows = pixel_rows(simulation, args.width)
+    indeces = sorted(rows.keys())
+    image = png([ rows[idx] for idx in indeces ], args.width,
+                args.row_height)
+
+    if args.output.endswith(".svg"):
+        start = None
+        if args.start:
+            hours, minutes = args.start.split(":")
+            start = int(hours)*60 + int(minutes)
+
+        with open(args.output, "w") as fp:
+            fp.write(svg(simulation, indeces, image, args.width,
+                         args.row_height, start))
+    else:
+        with open(args.output, "wb") as fp:
+            fp.write(image)
 
+def capacity():
+    parser = argparse.ArgumentParser(description="Report how much of the "
+                                     "frame budget a set of building modules "
+                                     "takes on this machine.")
+
+    populate_with_strip_arguments(parser)
+
+    parser.add_argument("--speed", "-s", help="Animation speed factor",
+                        type=float, default=1.0)
+    parser.add_argument("--framerate", help="How many times a second"
+                        "the strip’s state is rendered.",
+                        type=int, default=24)
+    parser.add_argument("--offset", "-o", help="First light’s ID to be used",
+                        type=int, default=0)
+    parser.add_argument("--end-marker", "-E",
+                        help="Do not count the EndMarker pixel.",
+                        action="store_false", default=True)
+    parser.add_argument("--frames", "-f", help="Number of frames to compute "
+                        "to measure the processing time.",
+                        type=int, default=24*60)
+    parser.add_argument("--simulate", help="Show the frames on a simulated "
+                        "strip that takes as long as the real one and "
+                        "measure at the configured framerate.",
+                        action="store_true", default=False)
     parser.add_argument("modules", nargs="+",
                         help="Python modules to import or python files to "
                         "evaluate to load building models")
 
-    town =  Town(*load_buildings(args.modules))
-    town.list_items()
+    args = parser.parse_args()
+
+    if args.frames < 1:
+        parser.error("--frames must be at least 1.")
+    if args.framerate < 1:
+        parser.error("--framerate must be at least 1.")
+
+    from .ws281x import wire_time
+    from .output import town_calibration
+    from .strips import DebugPixelStrip, SimulatedStrip
+
+    config.framerate = args.framerate
+    config.speed = args.speed
+    config.debug = False
+
+    town = Town(*load_buildings(args.modules))
+    if args.end_marker:
+        town.append(EndMarker())
+    engine = Engine(town, args.offset)
+
+    print("Pixels:")
+    for item in town:
+        print("  %5i  %s" % (len(item.indeces), item._info(),))
+    print("  %5i  total" % engine.lightcount)
+    print()
+
+    if args.channel is None:
+        channel = 1 if args.gpio in { 13, 19, 41, 45, 53 } else 0
+    else:
+        channel = args.channel
+
+    wire = wire_time(engine.lightcount, args.led_freq)
+    print(f"Output GPIO {args.gpio} channel {channel}: "
+          f"{engine.lightcount} pixels at {args.led_freq} Hz, "
+          f"{1000*wire:.3f}ms per show()")
+
+    # Measure the Calibration stage animate would install, too.
+    calibration = town_calibration(town, engine.lightcount)
+    if calibration is not None:
+        engine.output_stages.append(calibration)
+
+    timer = FrameTimer()
+    engine.observers.append(timer)
+    if args.simulate:
+        # The processing time includes show().
+        strip = SimulatedStrip(engine.lightcount, args.gpio, args.led_freq,
+                               args.dma, args.invert, args.brightness,
+                               channel)
+        engine.animate(strip, frames=args.frames)
+        wire = 0.0
+    else:
+        engine.animate(DebugPixelStrip(engine.lightcount),
+                       frames=args.frames, realtime=False)
+    compute = sum(timer.proctimes) / len(timer.proctimes)
+    worst = max(timer.proctimes)
+    print(f"Processing: {1000*compute:.3f}ms per frame on average, "
+          f"{1000*worst:.3f}ms at worst over {len(timer.proctimes)} frames")
+
+    frametime = 1 / config.framerate
+    print(f"Maximum framerate: {1/(wire + compute):.1f} fps "
+          f"({1/(wire + worst):.1f} at worst)")
+    left = frametime - wire - compute
+    print(f"At {config.framerate} fps: {1000*frametime:.3f}ms per frame, "
+          f"{1000*left:.3f}ms ({100*left/frametime:.1f}%) left")
+
+def startup_phases(start, imported, modules):
+    """
+    Called by startup_benchmark() in a fresh interpreter. Print the
+    time taken by each phase of a start as a Python dict.
+    """
+    from .strips import DebugPixelStrip
+
+    town = Town(*load_buildings(modules))
+    loaded = time.perf_counter()
+
+    engine = Engine(town)
+    initialized = time.perf_counter()
+
+    engine.animate(DebugPixelStrip(engine.lightcount),
+                   frames=1, realtime=False)
+    first_frame = time.perf_counter()
+
+    print({ "import": imported - start,
+            "load": loaded - imported,
+            "init": initialized - loaded,
+            "frame": first_frame - initialized, })
+
+def startup_benchmark():
+    parser = argparse.ArgumentParser(description="Measure how long it takes "
+                                     "from starting Python to the first "
+                                     "frame, without and with compiled "
+                                     "bytecode in __pycache__.")
+    parser.add_argument("--runs", "-n", help="Number of runs to average",
+                        type=int, default=5)
+    parser.add_argument("modules", nargs="+",
+                        help="Python modules to import or python files to "
+                        "evaluate to load building models")
+
+    args = parser.parse_args()
+
+    import subprocess, tempfile, ast
+
+    script = ( "import time; start = time.perf_counter(); "
+               "import limelights.cmdline as c; "
+               "c.startup_phases(start, time.perf_counter(), %r)" )
+
+    def run(env):
+        began = time.perf_counter()
+        output = subprocess.run([ sys.executable, "-c",
+                                  script % (args.modules,), ],
+                                check=True, capture_output=True,
+                                text=True, env=env).stdout
+        phases = ast.literal_eval(output.splitlines()[-1])
+        phases["total"] = time.perf_counter() - began
+        return phases
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Bytecode goes to an empty directory of its own, so the cold
+        # runs compile every module, the building modules and
+        # limelights included.
+        cold = dict(os.environ,
+                    PYTHONPYCACHEPREFIX=os.path.join(tmpdir, "cold"),
+                    PYTHONDONTWRITEBYTECODE="1")
+        warm = dict(os.environ,
+                    PYTHONPYCACHEPREFIX=os.path.join(tmpdir, "warm"))
+        warm.pop("PYTHONDONTWRITEBYTECODE", None)
+
+        for title, env in ( ("Without bytecode", cold,),
+                            ("Warm __pycache__", warm,), ):
+            if env is warm:
+                # Fill the cache.
+                run(env)
+
+            results = [ run(env) for a in range(args.runs) ]
+            print(title + ":")
+            for phase in results[0].keys():
+                average = sum([ r[phase] for r in results ]) / len(results)
+                print("  %-7s %8.2fms" % (phase, 1000*average,))
@@ -0,0 +1,128 @@
+"""
+Several Sources may show on the same pixels on different layers (see
+Source and Overlay in limelights.model). The Sources on the base
+layer (0) write to the frame’s Changes as usual. The others send
+LayerChanges which the Compositor blends on top of the base color
+in order of their layer, recomputing only the pixels whose layers
+changed in a frame.
+
+A layer Source yields TRANSPARENT to get out of the way. Nothing
+shows through below the base layer, so there it is off.
+"""
+
+from operator import attrgetter
+
+from .basetypes import Change
+
+TRANSPARENT = -1
+
+def opaque(color:int) -> int:
+    """
+    The color a base layer Source shows for `color`.
+    """
+    return 0 if color == TRANSPARENT else color
+
+def _channels(color:int):
+    return color >> 16, (color >> 8) & 0xff, color & 0xff
+
+def replace(base:int, color:int, alpha:float) -> int:
+    return color
+
+def add(base:int, color:int, alpha:float) -> int:
+    r, g, b = _channels(base)
+    R, G, B = _channels(color)
+    return ( min(255, r + R) << 16
+             | min(255, g + G) << 8
+             | min(255, b + B) )
+
+def maximum(base:int, color:int, alpha:float) -> int:
+    r, g, b = _channels(base)
+    R, G, B = _channels(color)
+    return max(r, R) << 16 | max(g, G) << 8 | max(b, B)
+
+def multiply(base:int, color:int, alpha:float) -> int:
+    r, g, b = _channels(base)
+    R, G, B = _channels(color)
+    return (r * R // 255) << 16 | (g * G // 255) << 8 | b * B // 255
+
+def blend_alpha(base:int, color:int, alpha:float) -> int:
+    r, g, b = _channels(base)
+    R, G, B = _channels(color)
+    return ( round(r + (R - r) * alpha) << 16
+             | round(g + (G - g) * alpha) << 8
+             | round(b + (B - b) * alpha) )
+
+blend_modes = { "replace": replace,
+                "add": add,
+                "max": maximum,
+                "multiply": multiply,
+                "alpha": blend_alpha, }
+
+class Compositor(object):
+    def __init__(self, framebuffer):
+        self.framebuffer = framebuffer
+
+        # Map the indeces of pixels that have layers to their base
+        # color and to a dict of Source → color respectively.
+        self.base = {}
+        self.layers = {}
+
+        # Pixels to recompute with the next frame, see forget().
+        self._stale = set()
+
+    def process(self, change:Change) -> Change:
+        """
+        Update the layers from `change` and replace the colors of
+        pixels whose layers changed with the composited color.
+        """
+        base = self.base
+        layers = self.layers
+        dirty = self._stale
+        self._stale = set()
+
+        for layer_change in change.layers:
+            source = layer_change.source
+            for idx, color in layer_change.change.items():
+                if idx not in base:
+                    # The base color is what’s on display now.
+                    base[idx] = change.get(idx, self.framebuffer[idx])
+                    layers[idx] = {}
+
+                if color == TRANSPARENT:
+                    layers[idx].pop(source, None)
+                else:
+                    layers[idx][source] = color
+                dirty.add(idx)
+
+        if base:
+            for idx in change.keys() & base.keys():
+                base[idx] = change[idx]
+                dirty.add(idx)
+
+        for idx in dirty:
+            stack = layers[idx]
+            if stack:
+                change[idx] = self.composite(base[idx], stack)
+            else:
+                change[idx] = base.pop(idx)
+                del layers[idx]
+
+        return change
+
+    def forget(self, sources):
+        """
+        Remove the colors of `sources` from the layers, e.g. after the
+        Building they belong to has been replaced. The pixels
+        concerned are recomputed with the next frame.
+        """
+        sources = set(sources)
+        for idx, stack in self.layers.items():
+            for source in stack.keys() & sources:
+                del stack[source]
+                self._stale.add(idx)
+
+    def composite(self, color:int, stack:dict) -> int:
+        for source in sorted(stack, key=attrgetter("layer")):
+            color = blend_modes[source.blend](color, stack[source],
+                                              source.alpha)
+        return color
@@ -0,0 +1,257 @@
+"""
+Control a running Engine through a Unix domain socket. Clients send
+one command per line and receive one line in reply starting with
+“ok” or “error”. Arguments containing spaces may be quoted.
+
+    speed <factor>                  Set config.speed for new animations.
+    override <name> on|off|<color>  Show a fixed color on a Building or
+                                    Room, e.g. to clean the model.
+    release <name>|all              Resume the regular animations.
+    identify <name>                 Blink twice, then resume.
+    colors [<name>]                 Print idx:rrggbb for each pixel.
+    timing                          Print frame number and timing stats.
+
+The server runs in threads of its own. Commands are queued and
+carried out by the Engine between two frames, at most `per_frame`
+of them each frame. When the queue is full, commands are rejected
+so a chatty client can’t take the Engine’s time.
+"""
+
+import sys, os, shlex, queue, threading, socketserver, inspect, traceback
+from itertools import repeat
+
+from . import config
+from .basetypes import NameableLights
+from .model import Source
+from .animations import on, off, transparent
+
+class ControlError(Exception): pass
+
+def blink(times:int=2, seconds:float=.5):
+    frames = max(1, round(seconds * config.framerate))
+    for a in range(times):
+        yield 0xffffff
+        yield from repeat(None, frames-1)
+        yield 0
+        yield from repeat(None, frames-1)
+
+def parse_color(s:str) -> int:
+    try:
+        return int(s.lstrip("#"), 16)
+    except ValueError:
+        raise ControlError(f"Not a color: {s}")
+
+class Command(object):
+    def __init__(self, words):
+        self.words = words
+        self.reply = None
+        self.done = threading.Event()
+
+class ControlServer(object):
+    def __init__(self, engine, path:str, maxqueue:int=16, per_frame:int=4,
+                 timeout:float=5.0, outfile=sys.stderr):
+        self.engine = engine
+        self.path = path
+        self.per_frame = per_frame
+        self.timeout = timeout
+        self.outfile = outfile
+        self.commands = queue.Queue(maxqueue)
+
+        # Map overridden Sources to their regular animations.
+        self.overridden = {}
+        self.proctime = 0.0
+
+    def install(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    reply = server.submit(line.decode("utf-8", "replace"))
+                    self.wfile.write(reply.encode("utf-8") + b"\n")
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.path,
+                                                             Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True,
+                         name="ControlServer").start()
+
+        # The colors command reads the framebuffer.
+        self.engine.track_framebuffer = True
+        self.engine.observers.append(self)
+
+    def submit(self, line:str) -> str:
+        """
+        Called by the server’s threads: Queue the command in `line`
+        and wait for the Engine to carry it out.
+        """
+        try:
+            words = shlex.split(line)
+        except ValueError as exc:
+            return f"error {exc}"
+
+        if not words:
+            return "error empty command"
+
+        command = Command(words)
+        try:
+            self.commands.put_nowait(command)
+        except queue.Full:
+            return "error busy"
+
+        if command.done.wait(self.timeout):
+            return command.reply
+        else:
+            return "error timeout"
+
+    def frame(self, engine, change, proctime):
+        self.proctime = proctime
+
+        commands = self.commands
+        for a in range(self.per_frame):
+            try:
+                command = commands.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                reply = self.execute(*command.words)
+            except ControlError as exc:
+                command.reply = f"error {exc}"
+            except Exception as exc:
+                # A bug in the command. Whatever goes wrong, the Engine
+                # must keep running.
+                print("control: internal error in", shlex.join(command.words),
+                      file=self.outfile)
+                traceback.print_exc(file=self.outfile)
+                command.reply = ( f"error internal error "
+                                  f"{exc.__class__.__name__}: {exc}" )
+            else:
+                command.reply = "ok" if reply is None else f"ok {reply}"
+            command.done.set()
+
+    def execute(self, name, *args):
+        method = getattr(self, "cmd_" + name, None)
+        if method is None:
+            raise ControlError(f"Unknown command: {name}")
+
+        try:
+            inspect.signature(method).bind(*args)
+        except TypeError:
+            raise ControlError(f"Wrong number of arguments for {name}")
+
+        return method(*args)
+
+    def find(self, name:str):
+        town = self.engine.town
+        if (building := town.building_by_name(name)) is not None:
+            return building
+
+        def walk(item):
+            if isinstance(item, NameableLights):
+                if item.name == name:
+                    return item
+                for a in item:
+                    if (found := walk(a)) is not None:
+                        return found
+            return None
+
+        if (found := walk(town)) is not None:
+            return found
+
+        raise ControlError(f"No such building or room: {name}")
+
+    def sources(self, item):
+        if isinstance(item, Source):
+            yield item
+        elif isinstance(item, list):
+            for a in item:
+                yield from self.sources(a)
+
+    def override(self, item, animations):
+        for source in self.sources(item):
+            if source not in self.overridden:
+                self.overridden[source] = source.animations
+
+            if source.layer:
+                source.animations = lambda: iter([transparent()])
+            else:
+                source.animations = animations
+
+    def release(self, sources):
+        for source in list(sources):
+            if (animations := self.overridden.pop(source, None)) is not None:
+                source.animations = animations
+
+    def cmd_speed(self, factor):
+        try:
+            factor = float(factor)
+        except ValueError:
+            raise ControlError(f"Not a number: {factor}")
+
+        if factor <= 0:
+            raise ControlError("Speed must be positive.")
+
+        config.speed = factor
+
+    def cmd_override(self, name, what):
+        if what == "on":
+            animation = lambda: on(0xffffff)
+        elif what == "off":
+            animation = off
+        else:
+            color = parse_color(what)
+            animation = lambda: on(color)
+
+        self.override(self.find(name), lambda: iter([animation()]))
+
+    def cmd_release(self, name):
+        if name == "all":
+            self.release(self.overridden.keys())
+        else:
+            self.release(self.sources(self.find(name)))
+
+    def cmd_identify(self, name):
+        item = self.find(name)
+        sources = list(self.sources(item))
+
+        def animations():
+            yield blink()
+            # Resume the regular animations once the blinking is done.
+            self.release(sources)
+
+        self.override(item, animations)
+
+    def cmd_colors(self, name=None):
+        framebuffer = self.engine.framebuffer
+        if name is None:
+            indeces = range(len(framebuffer))
+        else:
+            indeces = sorted(self.find(name).indeces)
+
+        return " ".join([ f"{idx}:{framebuffer[idx]:06x}"
+                          for idx in indeces ])
+
+    def cmd_timing(self):
+        engine = self.engine
+        return ( f"frame={int(engine.now)} framerate={config.framerate} "
+                 f"speed={config.speed} proctime={self.proctime:.4f} "
+                 f"jitter={engine.jitter:.4f} "
+                 f"max_jitter={engine.max_jitter:.4f}" )
+
+def send(path:str, line:str, timeout:float=10.0) -> str:
+    """
+    Send a command `line` to the ControlServer at `path` and return
+    its reply.
+    """
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(line.encode("utf-8") + b"\n")
+        with sock.makefile("rb") as fp:
+            return fp.readline().decode("utf-8").rstrip("\n")
@@ -1,12 +1,22 @@
-import sys, time
+import sys, time, heapq
 
 from . import config
-from .model import Changes, Time, Town
+from .model import Time, Town, Building, Source
+from .framebuffer import FrameBuffer
+from .compositing import Compositor
 from .utils import clear, home
 
+def sources(item):
+    if isinstance(item, Source):
+        yield item
+    elif isinstance(item, list):
+        for a in item:
+            yield from sources(a)
+
 class Engine(object):
     def __init__(self, town:Town, first_light_index:Time=0):
-        self._strip = None
+        # The strip animate() writes to.
+        self.strip = None
         self.town = town
 
         def indeces():
@@ -21,34 +31,221 @@ class Engine(object):
         self.lightcount = next(self.indeces)
         self.indeces = None
 
+        self.framebuffer = FrameBuffer(self.lightcount)
+
+        # The framebuffer is only kept up to date if this is set by
+        # one of its readers (like the FramebufferPublisher) or if
+        # there are Sources on layers for the Compositor to blend.
+        self.track_framebuffer = False
+        self.compositor = Compositor(self.framebuffer)
+
+        # Each frame’s Change passes through the output stages in
+        # order before it is written to the strip.
+        self.output_stages = []
+
+        # Observers are notified after each frame has been shown
+        # through their frame(engine, change, proctime) method.
+        self.observers = []
+
+        # A Timeline running precompiled Sources, see
+        # limelights.timeline.
+        self.timeline = None
+
+        # ( frame, counter, function, args, ) tuples, see call_at().
+        self._calls = []
+        self._counter = 0
+
         self._now = Time(0)
 
+        self.stride = 1
+
+        # The deviation of the time between two frames being shown
+        # from the frame time in seconds. The average is an
+        # exponential moving average.
+        self.jitter = 0.0
+        self.max_jitter = 0.0
+        self._last_shown = None
+
+    @property
+    def stride(self) -> int:
+        """
+        The number of frames each computed frame stands for. More
+        than 1 lowers the framerate on the strip and the work done
+        while the animations keep their timing: Engine.now advances
+        by the stride and limit() counts its holds down by it, see
+        limelights.quality.
+        """
+        return config.stride
+
+    @stride.setter
+    def stride(self, stride:int):
+        config.stride = stride
+
+    @property
+    def now(self) -> Time:
+        """
+        The number of the frame currently on display.
+        """
+        return self._now
+
     def _output_debug_info(self, strip, proctime):
         home()
         self.town.print_items(strip)
         print()
         print(self._now)
-        self._now += 1
         print("%.4f" % proctime)
+        print("jitter %.4f max %.4f" % (self.jitter, self.max_jitter,))
+
+    def _measure_jitter(self, frametime):
+        shown = time.monotonic()
+        if self._last_shown is not None:
+            jitter = abs(shown - self._last_shown - frametime)
+            self.jitter = 0.95 * self.jitter + 0.05 * jitter
+            if jitter > self.max_jitter:
+                self.max_jitter = jitter
+        self._last_shown = shown
+
+    def replace_building(self, old:Building, new:Building):
+        """
+        Replace `old` by `new` in the running Town. `new` must have
+        been engine_init()ed to the same pixels. Call this between two
+        frames, e.g. from an observer.
+        """
+        self._detach(old)
+        self.town.replace(old, new)
+
+    def call_at(self, frame:Time, function, *args):
+        """
+        Call `function` with `args` before frame `frame` is computed
+        or right away if it is due already.
+        """
+        if frame <= self._now:
+            function(*args)
+        else:
+            self._counter += 1
+            heapq.heappush(self._calls, (frame, self._counter,
+                                         function, args,))
+
+    @property
+    def next_call(self) -> Time|None:
+        """
+        The frame the next call_at() call is due, if any.
+        """
+        if self._calls:
+            return self._calls[0][0]
+        else:
+            return None
 
+    def advance_to(self, frame:Time):
+        """
+        Make `frame` the current frame without computing the ones in
+        between and run the calls due by then, e.g. for a Simulation.
+        """
+        self._now = Time(frame)
+        self._run_calls()
+
+    def _run_calls(self):
+        calls = self._calls
+        while calls and calls[0][0] <= self._now:
+            frame, counter, function, args = heapq.heappop(calls)
+            function(*args)
+
+    def _detach(self, building:Building) -> bool:
+        """
+        Take `building`’s Sources off the Timeline and out of the
+        Compositor’s layers. Return True if any were on the Timeline.
+        """
+        old_sources = list(sources(building))
+        timeline = False
+        for source in old_sources:
+            if source.timeline is not None:
+                source.timeline.forget(source)
+                timeline = True
+
+        self.compositor.forget(old_sources)
+        return timeline
+
+    def suspend(self, building:Building, keep:bool=False):
+        """
+        Take `building` out of frame processing and turn its pixels
+        off with the next frame, see Town.suspend(). Buildings with
+        Sources on the Timeline always start over on resume().
+        """
+        if self._detach(building):
+            keep = False
+        self.town.suspend(building, keep)
+
+    def resume(self, building:Building):
+        """
+        Run `building` again from the next frame on, see
+        Town.resume(). Its Sources that a Timeline ran before it was
+        suspended go back on the Timeline.
+        """
+        suspended = self.town.is_suspended(building)
+        self.town.resume(building)
+        if suspended and self.timeline is not None:
+            self.timeline.resume(building, int(self._now) + 1)
+
+    def animate(self, strip, frames:int|None=None, realtime:bool=True):
+        """
+        Show the town’s animations on `strip`. This will not return
+        unless a number of `frames` is given. If `realtime` is False,
+        frames are computed as fast as possible rather than at
+        config.framerate.
+        """
+        self.strip = strip
 
-    def animate(self, strip):
         if config.debug:
             clear()
 
         frametime = 1 / config.framerate
+        if any([ source.layer for source in sources(self.town) ]):
+            self.track_framebuffer = True
+
+        # A framebuffer tracked from the first frame on holds the whole
+        # frame. Its palette indeces are expanded in one gather, see
+        # limelights.framebuffer.
+        gather = self.track_framebuffer and hasattr(strip, "write_frame")
+
         start = time.time()
         changes = self.town.changes()
+        calls = self._calls
+        if calls:
+            self._run_calls()
         for change in changes:
-            change.apply_to(strip)
+            if self.timeline is not None:
+                self.timeline.step(self._now, change)
+            if change.layers or self.compositor.base:
+                change = self.compositor.process(change)
+            if self.track_framebuffer:
+                self.framebuffer.apply(change)
+
+            output = change
+            for stage in self.output_stages:
+                output = stage.process(self, output)
+            if gather and output is change and change:
+                strip.write_frame(self.framebuffer.colors)
+            else:
+                output.apply_to(strip)
 
             strip.show()
+            if realtime:
+                self._measure_jitter(frametime * self.stride)
 
             end = time.time()
             proctime=end-start
 
-            d = frametime - proctime
-            if d > 0:
+            if self.observers:
+                for observer in self.observers:
+                    observer.frame(self, change, proctime)
+
+                # The observers’ time is part of the frame, too.
+                end = time.time()
+
+            d = frametime * self.stride - (end - start)
+            if not realtime:
+                start = time.time()
+            elif d > 0:
                 time.sleep(d)
                 start = end + d
             else:
@@ -61,3 +258,12 @@ class Engine(object):
             if config.debug:
                 self._output_debug_info(strip, proctime)
                 start = time.time()
+
+            self._now += self.stride
+            if calls and calls[0][0] <= self._now:
+                self._run_calls()
+
+            if frames is not None:
+                frames -= 1
+                if frames <= 0:
+                    break
@@ -0,0 +1,96 @@
+"""
+Crossfades between the colors of consecutive animations. Colors are
+mixed in linear light rather than in their gamma encoded values, so
+a fade looks even to the eye. The conversions go through lookup
+tables computed once and the weights of each step of a fade of a
+given length are computed once per length.
+"""
+
+from . import config
+from .compositing import TRANSPARENT
+
+GAMMA = 2.2
+LINEAR_MAX = 0xffff
+
+_to_linear = None
+_from_linear = None
+_weights = {}
+_end = object()
+
+def _tables():
+    global _to_linear, _from_linear
+    if _to_linear is None:
+        _to_linear = [ round(LINEAR_MAX * (a / 255) ** GAMMA)
+                       for a in range(256) ]
+        _from_linear = bytes([ round(255 * (l / LINEAR_MAX) ** (1 / GAMMA))
+                               for l in range(LINEAR_MAX + 1) ])
+    return _to_linear, _from_linear
+
+def fade_weights(frames:int) -> list[int]:
+    """
+    The weight (0–256) of the target color in each frame of a fade
+    that takes `frames` frames.
+    """
+    if frames not in _weights:
+        _weights[frames] = [ (k * 256) // frames for k in range(1, frames+1) ]
+    return _weights[frames]
+
+def mix(a:int, b:int, weight:int) -> int:
+    """
+    Mix the 0xrrggbb colors `a` and `b` in linear light. `weight` is
+    b’s share from 0 to 256.
+    """
+    to_linear, from_linear = _tables()
+    w = 256 - weight
+    return ( from_linear[(to_linear[a >> 16] * w
+                          + to_linear[b >> 16] * weight) >> 8] << 16
+             | from_linear[(to_linear[(a >> 8) & 0xff] * w
+                            + to_linear[(b >> 8) & 0xff] * weight) >> 8] << 8
+             | from_linear[(to_linear[a & 0xff] * w
+                            + to_linear[b & 0xff] * weight) >> 8] )
+
+def fade_in(source, animation, frames:int):
+    """
+    Yield the colors of `animation`, but fade from the color
+    `source` showed last to the animation’s first color over
+    `frames` frames. The animation keeps running during the fade so
+    its timing stays the same. If it yields another color in the
+    meantime, the fade continues towards that one.
+    """
+    if config.speed != 1:
+        frames = int(frames/config.speed)
+    frames //= config.stride
+
+    animation = iter(animation)
+    start = source.fade_color
+
+    for color in animation:
+        if color is None:
+            yield None
+        elif frames < 2 or color == start \
+                or TRANSPARENT in ( color, start, ):
+            source.fade_color = color
+            yield color
+            break
+        else:
+            target = color
+            for weight in fade_weights(frames)[:-1]:
+                current = mix(start, target, weight)
+                source.fade_color = current
+                yield current
+
+                color = next(animation, _end)
+                if color is _end:
+                    return
+                elif color is not None:
+                    start = current
+                    target = color
+
+            source.fade_color = target
+            yield target
+            break
+
+    for color in animation:
+        if color is not None:
+            source.fade_color = color
+        yield color
@@ -0,0 +1,163 @@
+import sys, array
+
+# Palette sizes for the index types
+BYTE_PALETTE = 256
+SHORT_PALETTE = 65536
+
+# The most colors on display byte indeces are kept for when the
+# palette is compacted.
+NARROW_PALETTE = 3 * BYTE_PALETTE // 4
+
+class FrameBuffer(object):
+    """
+    The FrameBuffer is the Engine’s record of the color each pixel
+    on the strip is currently set to. The colors of a town come from
+    a small set, so they are kept in a palette and the FrameBuffer
+    stores one index into it per pixel, a byte as long as there are
+    no more than 256 colors, two bytes for up to 65536. Every 256 new
+    colors, the colors no longer on display are dropped from the
+    palette, which goes back to byte indeces if few enough are left.
+    If more than 65534 colors are on display, the FrameBuffer stores
+    one 0xrrggbb int per pixel from then on.
+
+    The colors property and tobytes() expand the indeces to 0xrrggbb
+    ints, so the FrameBuffer can be handed to the strip, other parts
+    of the program (and other programs) as a single block of memory.
+    """
+    def __init__(self, size:int, palette:bool=True):
+        if palette:
+            self.palette = [ 0 ]
+            self.index = { 0: 0 }
+            self.indeces = array.array("B", bytes(size))
+        else:
+            self.palette = None
+            self.index = None
+            self.indeces = array.array("I", bytes(4*size))
+
+        # Byte translation tables of the palette’s blue, green and red
+        # channels, see colors.
+        self._tables = None
+
+        # The colors of two byte indeces, see _compact().
+        self._gathered = None
+
+    def __len__(self):
+        return len(self.indeces)
+
+    def __getitem__(self, idx):
+        if self.palette is None:
+            return self.indeces[idx]
+        else:
+            return self.palette[self.indeces[idx]]
+
+    def apply(self, change):
+        indeces = self.indeces
+        index = self.index
+        if index is None:
+            for idx, color in change.items():
+                indeces[idx] = color
+            return
+
+        gathered = self._gathered
+        items = iter(change.items())
+        for idx, color in items:
+            i = index.get(color)
+            if i is None:
+                i = self._add(color)
+                indeces = self.indeces
+                if i is None:
+                    # The palette was given up on, the rest of the
+                    # Change goes in as 0xrrggbb ints.
+                    indeces[idx] = color
+                    for idx, color in items:
+                        indeces[idx] = color
+                    return
+                index = self.index
+                gathered = self._gathered
+            indeces[idx] = i
+            if gathered is not None:
+                gathered[idx] = color
+
+    def _add(self, color:int) -> int:
+        """
+        Add `color` to the palette and return its index. Every
+        BYTE_PALETTE colors the palette is compacted, which may widen
+        or narrow the indeces or give up on the palette. Return None
+        in the latter case.
+        """
+        if len(self.palette) % BYTE_PALETTE == 0:
+            self._compact()
+            if self.palette is None:
+                return None
+
+        palette = self.palette
+        self._tables = None
+        self.index[color] = len(palette)
+        palette.append(color)
+        return len(palette) - 1
+
+    def _compact(self):
+        # Keep only the colors on display.
+        used = sorted(set(self.indeces))
+        if len(used) >= SHORT_PALETTE - 1:
+            self.indeces = array.array("I", map(self.palette.__getitem__,
+                                                self.indeces))
+            self.palette = None
+            self.index = None
+            self._gathered = None
+            return
+
+        # Byte indeces while there is room for new colors between two
+        # compactions, two bytes otherwise.
+        if len(used) <= NARROW_PALETTE:
+            typecode = "B"
+        else:
+            typecode = "H"
+
+        renumber = { old: new for new, old in enumerate(used) }
+        self.palette = [ self.palette[old] for old in used ]
+        self.index = { color: i for i, color in enumerate(self.palette) }
+        self.indeces = array.array(typecode,
+                                   map(renumber.__getitem__, self.indeces))
+
+        # Two byte indeces can’t be gathered through translation
+        # tables, so their colors are kept up to date by apply().
+        if typecode == "H":
+            self._gathered = array.array("I", map(self.palette.__getitem__,
+                                                  self.indeces))
+        else:
+            self._gathered = None
+
+    @property
+    def colors(self) -> array.array:
+        """
+        An array with one 0xrrggbb int per pixel. It may be the
+        FrameBuffer’s own.
+        """
+        indeces = self.indeces
+        if self.palette is None:
+            return indeces
+        elif self._gathered is not None:
+            return self._gathered
+
+        # Gather each channel through a byte translation table and
+        # interleave them.
+        if self._tables is None:
+            palette = self.palette + [ 0 ] * (BYTE_PALETTE - len(self.palette))
+            self._tables = [ bytes([ (color >> shift) & 0xff
+                                     for color in palette ])
+                             for shift in ( 0, 8, 16, ) ]
+
+        data = indeces.tobytes()
+        ret = bytearray(4*len(data))
+        if sys.byteorder == "little":
+            offsets = ( 0, 1, 2, )
+        else:
+            offsets = ( 3, 2, 1, )
+        for offset, table in zip(offsets, self._tables):
+            ret[offset::4] = data.translate(table)
+
+        return array.array("I", ret)
+
+    def tobytes(self) -> bytes:
+        return self.colors.tobytes()
@@ -0,0 +1,136 @@
+"""
+Run a Town through the reference Engine and through an alternative
+one, record what each of them wrote to the strip and compare the
+two. Any engine optimization must produce the exact same frames as
+the reference. The journal reads the strip backend’s colors after
+each frame, so it covers the output stages and the way the frame is
+written (see limelights.strips) as well as the animations.
+
+A frame journal contains the frames’ pixel deltas encoded the same
+way the flight recorder does it, preceded by a header (see
+`journal_header` below).
+"""
+
+import random, array, struct, importlib
+
+from . import config
+from .recorder import encode_frame, decode_frames
+from .output import town_calibration
+from .strips import CountingStrip
+
+MAGIC = b"LLFJ"
+VERSION = 1
+
+# magic, version, pixel count, framerate, frame count
+journal_header = struct.Struct("=4sIIII")
+
+class FrameJournal(object):
+    """
+    An Engine observer that records the pixels of the Engine’s strip
+    that changed color in each frame, in order of their indeces. The
+    strip must keep its colors in an array like the ArrayStrip.
+    Frames a stride above 1 skipped (see Engine.stride) are recorded
+    without changes.
+    """
+    def __init__(self, size:int):
+        self.size = size
+        self.framerate = config.framerate
+        self.frame_count = 0
+        self.previous = array.array("I", bytes(4*size))
+        self.data = bytearray()
+        self.next_frame = None
+
+    def frame(self, engine, change, proctime):
+        colors = engine.strip.colors
+        previous = self.previous
+        delta = {}
+        if colors != previous:
+            for idx, ( color, old, ) in enumerate(zip(colors, previous)):
+                if color != old:
+                    delta[idx] = color
+            previous[:] = colors
+
+        now = int(engine.now)
+        if self.next_frame is not None:
+            for frame in range(self.next_frame, now):
+                self.data += encode_frame({})
+                self.frame_count += 1
+        self.data += encode_frame(delta)
+        self.frame_count += 1
+        self.next_frame = now + 1
+
+    def frames(self):
+        return decode_frames(self.data)
+
+    def save(self, path):
+        with open(path, "wb") as fp:
+            fp.write(journal_header.pack(MAGIC, VERSION, self.size,
+                                         self.framerate, self.frame_count))
+            fp.write(self.data)
+
+    @classmethod
+    def load(FrameJournal, path):
+        with open(path, "rb") as fp:
+            data = fp.read()
+
+        magic, version, size, framerate, frame_count = \
+            journal_header.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a limelights frame journal.")
+
+        self = FrameJournal(size)
+        self.framerate = framerate
+        self.frame_count = frame_count
+        self.data = bytearray(data[journal_header.size:])
+        return self
+
+def record(engine_class, town_factory, seed:int, frames:int,
+           strip_class=CountingStrip):
+    """
+    Seed the random number generator, create a Town using
+    `town_factory` and run it through an instance of `engine_class`
+    for `frames` frames with the Town’s corrections applied, showing
+    them on a `strip_class` strip. Return the engine and its
+    FrameJournal.
+    """
+    random.seed(seed)
+    engine = engine_class(town_factory())
+
+    calibration = town_calibration(engine.town, engine.lightcount)
+    if calibration is not None:
+        engine.output_stages.append(calibration)
+
+    journal = FrameJournal(engine.lightcount)
+    engine.observers.append(journal)
+
+    engine.animate(strip_class(engine.lightcount),
+                   frames=frames, realtime=False)
+
+    return engine, journal
+
+def first_difference(a:FrameJournal, b:FrameJournal):
+    """
+    Return the (frame number, pixel index, color in a, color in b)
+    of the first difference between the two journals or None if
+    they are the same. A color is None if the pixel did not change in
+    that frame.
+    """
+    for frame, (A, B) in enumerate(zip(a.frames(), b.frames())):
+        if A != B:
+            for idx in sorted(set(A.keys()) | set(B.keys())):
+                if A.get(idx) != B.get(idx):
+                    return frame, idx, A.get(idx), B.get(idx)
+
+    if a.frame_count != b.frame_count:
+        frame = min(a.frame_count, b.frame_count)
+        return frame, None, None, None
+
+    return None
+
+def import_engine(name):
+    """
+    Import an Engine class given as “module:Class”.
+    """
+    modulename, classname = name.split(":")
+    module = importlib.import_module(modulename)
+    return getattr(module, classname)
@@ -0,0 +1,139 @@
+"""
+Draw the colors of a simulated night as an image with one row per
+pixel and one column per time bucket. The colors come from a
+Simulation (see limelights.simulation), so a night is drawn from
+its holds rather than frame by frame. tv(), candle() and other
+animations show as the average of the colors sampled. Sources on
+layers above the base layer are not drawn.
+
+Images are written as PNG or, with the building and room labels in
+the margin and an hour scale on top, as SVG with the PNG embedded.
+"""
+
+import sys, array, zlib, struct, base64
+from xml.sax.saxutils import escape
+
+from . import config
+from .utils import label
+
+def pixel_rows(simulation, width:int) -> dict:
+    """
+    Return a dict mapping pixel indeces to an array of `width`
+    0xrrggbb colors. The pixels of a Source corrected alike share
+    their array.
+    """
+    bucket = max(1, simulation.frames / width)
+
+    ret = {}
+    for state in simulation.states.values():
+        if state.source.layer:
+            continue
+
+        for i, ( tables, indeces, ) in enumerate(state.groups):
+            row = array.array("I", bytes(4*width))
+            for segment in state.segments:
+                a = int(segment.start / bucket)
+                b = min(width, max(a+1, int(segment.end / bucket)))
+                if a < width:
+                    row[a:b] = ( array.array("I", [ segment.colors[i] ])
+                                 * (b - a) )
+
+            for idx in indeces:
+                ret[idx] = row
+
+    return ret
+
+def png(rows:list, width:int, row_height:int=1) -> bytes:
+    """
+    Encode a list of arrays of 0xrrggbb colors as an RGB PNG image.
+    """
+    raw = bytearray()
+    for row in rows:
+        if sys.byteorder == "big":
+            row = array.array("I", row)
+            row.byteswap()
+
+        # b, g, r, 0 for each pixel
+        data = row.tobytes()
+        line = bytearray(1 + 3*width)
+        line[1::3] = data[2::4]
+        line[2::3] = data[1::4]
+        line[3::3] = data[0::4]
+
+        raw += line * row_height
+
+    def chunk(kind, data):
+        return ( struct.pack(">I", len(data)) + kind + data
+                 + struct.pack(">I", zlib.crc32(kind + data)) )
+
+    height = len(rows) * row_height
+    return ( b"\x89PNG\r\n\x1a\n"
+             + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height,
+                                          8, 2, 0, 0, 0))
+             + chunk(b"IDAT", zlib.compress(bytes(raw), 6))
+             + chunk(b"IEND", b"") )
+
+def svg(simulation, indeces:list, image:bytes, width:int, row_height:int,
+        start_minute:int|None=None, margin:int=240, top:int=16) -> str:
+    """
+    Wrap the PNG `image` of the pixels with `indeces` in an SVG
+    document with the building and room labels in the left margin and
+    an hour scale on top. `start_minute` is the time of day the
+    simulation started.
+    """
+    position = { idx: i for i, idx in enumerate(indeces) }
+    height = len(indeces) * row_height
+
+    out = [ f'<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{margin + width}" height="{top + height}" '
+            f'font-family="sans-serif">',
+            '<rect width="100%" height="100%" fill="white"/>',
+            f'<image x="{margin}" y="{top}" width="{width}" '
+            f'height="{height}" style="image-rendering:pixelated" '
+            f'href="data:image/png;base64,'
+            f'{base64.b64encode(image).decode("ascii")}"/>' ]
+
+    def text(x, y, size, s, anchor="start"):
+        out.append(f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size:.1f}" '
+                   f'text-anchor="{anchor}" dominant-baseline="middle">'
+                   f'{escape(s)}</text>')
+
+    # Map Buildings’ id()s to ( Building, first row, last row, ).
+    buildings = {}
+    for state in simulation.states.values():
+        rows = sorted([ position[idx] for idx in state.source.indeces
+                        if idx in position ])
+        if not rows:
+            continue
+
+        first, last = rows[0], rows[-1]
+        size = min(10, (last - first + 1) * row_height * .9)
+        text(margin - 4, top + (first + last + 1) / 2 * row_height, size,
+             label(state.room), "end")
+
+        if (building := state.building) is not None:
+            if id(building) in buildings:
+                b, f, l = buildings[id(building)]
+                first, last = min(f, first), max(l, last)
+            buildings[id(building)] = ( building, first, last, )
+
+    for building, first, last in buildings.values():
+        y0 = top + first * row_height
+        y1 = top + (last + 1) * row_height
+        out.append(f'<line x1="2" y1="{y0}" x2="2" y2="{y1}" '
+                   'stroke="black"/>')
+        text(6, (y0 + y1) / 2, 10, label(building))
+
+    frames_per_hour = 3600 * config.framerate
+    for hour in range(int(simulation.frames / frames_per_hour) + 1):
+        x = margin + hour * frames_per_hour / simulation.frames * width
+        if start_minute is None:
+            s = f"+{hour}h"
+        else:
+            s = f"{(start_minute // 60 + hour) % 24:02}:{start_minute % 60:02}"
+        out.append(f'<line x1="{x:.1f}" y1="{top - 4}" x2="{x:.1f}" '
+                   f'y2="{top}" stroke="black"/>')
+        text(x, top / 2, 10, s, "middle")
+
+    out.append("</svg>")
+    return "\n".join(out)
@@ -1,11 +1,14 @@
-import random, dataclasses, types
+import random, types
 from typing import Generator
 
 from . import config
 from .basetypes import (Time, Duration, randmins, Color,
                         Animation, Animations, AnimationsFunction,
-                        Change, Changes, Light, Lamp, NameableLights)
+                        Change, Changes, LayerChange,
+                        Light, Lamp, NameableLights)
 from .animations import limit, repeats, on, off, tv, candle
+from .fading import fade_in
+from .compositing import TRANSPARENT
 
 class Pixel(Light):
     """
@@ -29,24 +32,99 @@ class Pixel(Light):
     def __lt__(self, other):
         return self.idx < other.idx
 
+class Overlay(Light):
+    """
+    An Overlay is a Light that controls the pixels of another item
+    (a Room, Lamp or Pixel) without having any of its own. Use it
+    with a Source on a layer above the base layer, e.g. a TV’s glow
+    on top of a room’s light:
+
+        livingroom = Room("Living room", color=0x553311)
+        tvglow = Room(Overlay(livingroom), layer=1, blend="add")
+    """
+    def __init__(self, target):
+        self.target = target
+        self._indeces = None
+
+    def engine_init(self, engine):
+        pass
+
+    @property
+    def indeces(self):
+        # The target’s pixels get their indeces during engine_init()
+        # which may run after ours.
+        if self._indeces is None:
+            indeces = self.target.indeces
+            if None in indeces:
+                return indeces
+            self._indeces = sorted(indeces)
+        return set(self._indeces)
+
+    def change_to(self, color) -> Change:
+        if self._indeces is None:
+            self.indeces
+        return Changes([Change(idx, color) for idx in self._indeces])
+
 class Source(object):
     """
     A source is a Light that has animations to it.
     A source has a generator of Changes.
 
-    The animations generator may be changed on the fly. The next
-    Change yielded by changes() will reflect the er… change.
+    The animations generator may be changed on the fly. If this
+    Source’s changes() are advanced later in the same frame, it shows
+    the new animations’ first color in that frame, otherwise in the
+    next one. Use send() to switch at an exact frame. Setting the
+    animations they already are does nothing. If the Source’s own
+    animations set them, the new ones take over when the current
+    animations() are done, without a restart.
+
+    Sources on a `layer` above 0 are composited with the other
+    layers of their pixels by the Engine using the `blend` mode
+    (see limelights.compositing). `alpha` is used by the “alpha”
+    blend mode.
+
+    If `fade` is set, each animation fades in from the color the
+    previous one left behind over that many frames.
     """
-    def __init__(self, light:Light, animations:AnimationsFunction):
+    def __init__(self, light:Light, animations:AnimationsFunction,
+                 layer:int=0, blend:str="replace", alpha:float=1.0,
+                 fade:Time=0):
         self.light = light
-        self._dirty = False
         self._animations = animations
+        self._engine = None
+
+        # Where the Space running us keeps our changes() generator as
+        # a ( list or dict, index or key, ) tuple, so it can be
+        # replaced when our animations are set.
+        self._slot = None
+
+        self.layer = layer
+        self.blend = blend
+        self.alpha = alpha
+
+        self.fade = fade
+        self.fade_color = 0
+
+        # The animation currently running.
+        self.animation = None
+
+        # The Timeline running us instead of changes(), if any.
+        self.timeline = None
+
+        # An object whose animations_set() method is called with us
+        # when our animations are set, e.g. a Simulation.
+        self.observer = None
 
     @property
     def indeces(self):
         return self.light.indeces
 
+    @property
+    def on_timeline(self) -> bool:
+        return self.timeline is not None
+
     def engine_init(self, engine):
+        self._engine = engine
         self.light.engine_init(engine)
 
     @property
@@ -55,24 +133,48 @@ class Source(object):
 
     @animations.setter
     def animations(self, animations:AnimationsFunction):
+        if animations == self._animations:
+            return
+
         self._animations = animations
-        self._dirty = True
+        if self.observer is not None:
+            self.observer.animations_set(self)
+        if self.timeline is not None:
+            self.timeline.release(self)
+        elif self._slot is not None:
+            container, key = self._slot
+            # Our changes() are running and will pick them up.
+            if not getattr(container[key], "gi_running", False):
+                container[key] = self.changes()
+
+    def send(self, animations:AnimationsFunction, at:Time|None=None):
+        """
+        Switch to `animations` so their first color shows in frame
+        `at`. Without `at`, switch right away like setting the
+        animations property.
+        """
+        if at is None:
+            self.animations = animations
+        else:
+            self._engine.call_at(at, setattr, self, "animations", animations)
 
     def changes(self) -> Generator[Change, None, None]:
         while True:
-            self._dirty = False
             for animation in self.animations():
+                self.animation = animation
+                if self.fade:
+                    animation = fade_in(self, animation, self.fade)
+
                 for color in animation:
                     if color is None:
                         yield None
+                    elif self.layer:
+                        yield LayerChange(self, self.light.change_to(color))
+                    elif color == TRANSPARENT:
+                        yield self.light.change_to(0)
                     else:
                         yield self.light.change_to(color)
 
-                    if self._dirty:
-                        break
-                if self._dirty:
-                    break
-
 class Space(NameableLights):
     """
     A space is a collection of Sources and a genrator of
@@ -82,8 +184,21 @@ class Space(NameableLights):
         for source in self:
             source.engine_init(engine)
 
+    @property
+    def on_timeline(self) -> bool:
+        return len(self) > 0 and all([ getattr(item, "on_timeline", False)
+                                       for item in self ])
+
     def changes(self) -> Generator[Change, None, None]:
-        running = [source.changes() for source in self]
+        # Sources run by a Timeline (see limelights.timeline) don’t
+        # need to be advanced here.
+        running = []
+        for source in self:
+            if not getattr(source, "on_timeline", False):
+                if isinstance(source, Source):
+                    source._slot = ( running, len(running), )
+                running.append(source.changes())
+
         while True:
             yield Changes([next(r) for r in running])
 
@@ -95,14 +210,22 @@ class Room(Space):
     and runs the on() animation on them, turning the light in the room
     to a specified default color.
     """
-    def __init__(self, *lights, lightnum=1, color=0xffffff):
+    def __init__(self, *lights, lightnum=1, color=0xffffff,
+                 layer=0, blend="replace", alpha=1.0, fade=0,
+                 correction=None):
         """
         Specific “lights” may be passed as positional
         parameters. If a string is passed among the lights, it is
         assumed to be the room’s name. If ferer lights are specified than
         `lightnum`, default lights will be created in their stead.
+
+        `layer`, `blend`, `alpha` and `fade` are passed to the Source.
+        A `correction` (see limelights.output.Correction) calibrates
+        the room’s pixels.
         """
         self._color = color
+        if correction is not None:
+            self.correction = correction
 
         lamp = Lamp()
 
@@ -115,12 +238,18 @@ class Room(Space):
         while len(lamp) < lightnum:
             lamp.append(self.make_default_pixel())
 
-        self.append(Source(lamp, self.animations))
+        self.append(Source(lamp, self.animations, layer, blend, alpha,
+                           fade))
 
     @property
     def source(self):
         return self[0]
 
+    # Let a Timeline compile this Room’s animations ahead of time.
+    # Only set this if animations() doesn’t depend on or change
+    # other Sources.
+    precompile = False
+
     def animations(self):
         yield self.on()
 
@@ -153,6 +282,8 @@ class HotelRoom(Room):
     These default times may vary and I’ll probably forget updating
     this comment, but you get the idea.
     """
+    precompile = True
+
     def __init__(self, *lights, lightnum=1, color=0x553311,
                  regular=randmins(3,10),
                  beforetv=randmins(2,8),
@@ -207,6 +338,8 @@ class Stairwell(Room):
     This will happen once every 5-12 (“usage=”) minutes for
     1-1 minute. (“light=”).
     """
+    precompile = True
+
     def __init__(self, *lights, lightnum=None, color=0x553311,
                  usage=randmins(5,12), light=Time.from_minutes(1)):
         super().__init__(*lights, lightnum=lightnum, color=color)
@@ -227,14 +360,152 @@ class Fireplace(Room):
     pass
 
 class Building(Space):
+    def __init__(self, *items, hours=None):
+        """
+        `hours` are the times of day the Building is animated as
+        “HH:MM-HH:MM,…”. It is dark and costs no time otherwise,
+        see limelights.schedule. None means all day.
+        """
+        super().__init__(*items)
+        self.hours = hours
+
     def _colorinfo(self, strip): pass
 
 class Town(Space):
+    def __init__(self, *items):
+        super().__init__(*items)
+
+        # ( Building, [ ( start minute, end minute, ), … ], ) tuples,
+        # see schedule(), and the id()s of the Buildings scheduled by
+        # their own hours=.
+        self.schedules = []
+        self._own_hours = set()
+        for item in self:
+            if getattr(item, "hours", None):
+                self.schedule(item, item.hours)
+                self._own_hours.add(id(item))
+
+        self._running = None
+        self._active = []
+        self._blank = []
+
+        # The id()s of the suspended Buildings and the changes()
+        # generators kept for resume().
+        self._suspended = set()
+        self._kept = {}
+
     def _colorinfo(self, strip): pass
 
+    def _index(self, building:Building) -> int:
+        for i, b in enumerate(self):
+            if b is building:
+                return i
+        raise ValueError(f"{building!r} is not part of this Town.")
+
+    def schedule(self, building:Building, hours:str|list):
+        """
+        Set the hours `building` is active, see limelights.schedule.
+        """
+        from .schedule import parse_hours
+
+        if type(hours) is str:
+            hours = parse_hours(hours)
+
+        self.schedules = [ (b, h,) for b, h in self.schedules
+                           if b is not building ]
+        self.schedules.append( (building, hours,) )
+        self._own_hours.discard(id(building))
+
+    def changes(self) -> Generator[Change, None, None]:
+        # The running generators are kept so single Buildings may be
+        # replaced or suspended while the Engine runs.
+        self._running = [ None if id(building) in self._suspended
+                          else building.changes()
+                          for building in self ]
+        self._update_active()
+
+        active = self._active
+        blank = self._blank
+        while True:
+            change = Changes([next(r) for r in active])
+            if blank:
+                for c in blank:
+                    change.update(c)
+                blank.clear()
+            yield change
+
+    def _update_active(self):
+        self._active[:] = [ r for r in self._running if r is not None ]
+
+    def replace(self, old:Building, new:Building):
+        """
+        Put `new` in `old`’s place and run its changes() from the
+        next frame on. The other Buildings keep running undisturbed.
+        `new` must have been engine_init()ed. Hours set by schedule()
+        carry over to `new`, otherwise `new`’s own hours= apply.
+        """
+        i = self._index(old)
+        self[i] = new
+
+        hours = None
+        for b, h in self.schedules:
+            if b is old:
+                hours = h
+        own = hours is None or id(old) in self._own_hours
+        self.schedules = [ (b, h,) for b, h in self.schedules
+                           if b is not old ]
+        self._own_hours.discard(id(old))
+        if not own:
+            self.schedule(new, hours)
+        elif getattr(new, "hours", None):
+            self.schedule(new, new.hours)
+            self._own_hours.add(id(new))
+
+        if id(old) in self._suspended:
+            self._suspended.discard(id(old))
+            self._kept.pop(id(old), None)
+            self._suspended.add(id(new))
+        elif self._running is not None:
+            self._running[i] = new.changes()
+            self._update_active()
+
+    def suspend(self, building:Building, keep:bool=False):
+        """
+        Stop advancing `building`’s changes() and turn its pixels
+        off with the next frame. If `keep` is set, resume() will
+        continue its animations where they were suspended, otherwise
+        they start over.
+        """
+        if id(building) in self._suspended:
+            return
+
+        i = self._index(building)
+        self._suspended.add(id(building))
+        if self._running is not None:
+            if keep:
+                self._kept[id(building)] = self._running[i]
+            self._running[i] = None
+            self._update_active()
+
+        self._blank.append(dict.fromkeys(building.indeces, 0))
+
+    def resume(self, building:Building):
+        if id(building) not in self._suspended:
+            return
+
+        i = self._index(building)
+        self._suspended.discard(id(building))
+        changes = self._kept.pop(id(building), None)
+        if self._running is not None:
+            self._running[i] = changes or building.changes()
+            self._update_active()
+
+    def is_suspended(self, building:Building) -> bool:
+        return id(building) in self._suspended
+
     def building_by_name(self, name) -> Building|None:
         for b in self:
-            if b.identifyer == name or b.name == name:
+            if getattr(b, "identifyer", None) == name or b.name == name:
                 return b
 
         return None
@@ -0,0 +1,394 @@
+"""
+Output stages sit between the Engine’s framebuffer and the strip.
+Each frame’s Change passes through the Engine’s output_stages in
+order before it is written to the strip. The framebuffer keeps the
+colors the animations asked for, the strip gets the processed ones.
+"""
+
+import sys, array
+
+from . import config
+from .basetypes import Change, Changes
+from .basetypes.temperature import temperature_int
+from .model import Source
+from .utils import minute_of_day
+
+def frame_change(colors) -> Change:
+    """
+    Return a Change that sets every pixel to the corresponding
+    entry in `colors`.
+    """
+    ret = Changes([])
+    ret.update(enumerate(colors))
+    ret.frame = colors
+    return ret
+
+def scale_table(factor:float) -> bytes:
+    """
+    A translation table that multiplies each byte by `factor`.
+    """
+    return bytes([ min(255, int(a * factor)) for a in range(256) ])
+
+def scale_colors(colors:array.array, table:bytes) -> array.array:
+    """
+    Apply `table` to every channel of every 0xrrggbb int in `colors`
+    in one go.
+    """
+    ret = array.array(colors.typecode)
+    ret.frombytes(colors.tobytes().translate(table))
+    return ret
+
+# The offsets of the red, green and blue bytes of a 0xrrggbb int
+# in memory.
+if sys.byteorder == "little":
+    channel_offsets = ( 2, 1, 0, )
+else:
+    channel_offsets = ( 1, 2, 3, )
+
+def translate_channels(colors:array.array, tables) -> array.array:
+    """
+    Apply one translation table per channel to every 0xrrggbb int
+    in `colors`. `tables` are the (r, g, b) tables.
+    """
+    data = bytearray(colors.tobytes())
+    for offset, table in zip(channel_offsets, tables):
+        data[offset::4] = data[offset::4].translate(table)
+
+    ret = array.array(colors.typecode)
+    ret.frombytes(data)
+    return ret
+
+class OutputStage(object):
+    def __init__(self, size:int):
+        self.size = size
+
+    def process(self, engine, change:Change) -> Change:
+        raise NotImplementedError()
+
+class PowerLimiter(OutputStage):
+    """
+    Estimate the current the pixels draw and darken the whole frame
+    when it would exceed `budget` mA. A pixel draws `idle` mA when
+    dark and `channel` mA per color channel at full brightness.
+
+    The sums of the channels over the strip are updated from the
+    changed pixels only. When the scale factor changes, the whole
+    frame is rewritten.
+    """
+    def __init__(self, size:int, budget:float,
+                 channel:float=20.0, idle:float=1.0):
+        super().__init__(size)
+        self.budget = budget
+        self.channel = channel
+        self.idle = idle
+
+        self.colors = array.array("I", bytes(4*size))
+        self.r = self.g = self.b = 0
+
+        self.factor = 1.0
+        self.table = None
+
+    @property
+    def current(self) -> float:
+        """
+        The estimated current in mA at full brightness.
+        """
+        return ( self.size * self.idle
+                 + (self.r + self.g + self.b) * self.channel / 255 )
+
+    def process(self, engine, change:Change) -> Change:
+        colors = self.colors
+        for idx, color in change.items():
+            old = colors[idx]
+            if old != color:
+                colors[idx] = color
+                self.r += (color >> 16) - (old >> 16)
+                self.g += ((color >> 8) & 0xff) - ((old >> 8) & 0xff)
+                self.b += (color & 0xff) - (old & 0xff)
+
+        current = self.current
+        if current > self.budget:
+            idle = self.size * self.idle
+            # Quantize the factor so we don’t rewrite the whole frame
+            # on every little change.
+            factor = int(256 * (self.budget - idle) / (current - idle)) / 256
+            factor = max(factor, 0.0)
+        else:
+            factor = 1.0
+
+        if factor != self.factor:
+            self.factor = factor
+            if factor == 1.0:
+                self.table = None
+                return frame_change(colors)
+            else:
+                self.table = scale_table(factor)
+                return frame_change(scale_colors(colors, self.table))
+        elif self.table is None:
+            return change
+        else:
+            table = self.table
+            ret = Changes([])
+            for idx in change.keys():
+                color = colors[idx]
+                ret[idx] = ( table[color >> 16] << 16
+                             | table[(color >> 8) & 0xff] << 8
+                             | table[color & 0xff] )
+            return ret
+
+class Correction(object):
+    """
+    Gamma, white balance and brightness for a set of pixels. Any of
+    these may be None to use the value of an enclosing item’s
+    Correction or the default.
+
+    `white` is a (r, g, b) tuple of factors applied to the channels
+    to make up for a pixel type’s tint.
+    """
+    def __init__(self, gamma:float|None=None,
+                 white:tuple[float]|None=None,
+                 brightness:float|None=None):
+        self.gamma = gamma
+        self.white = white
+        self.brightness = brightness
+
+    def merged(self, other):
+        """
+        Return a new Correction with `other`’s values overriding ours.
+        """
+        def pick(a, b):
+            return a if b is None else b
+
+        return Correction(pick(self.gamma, other.gamma),
+                          pick(self.white, other.white),
+                          pick(self.brightness, other.brightness))
+
+    @property
+    def key(self):
+        return ( self.gamma, self.white, self.brightness, )
+
+class Calibration(OutputStage):
+    """
+    Correct every pixel’s color through 256 entry per-channel lookup
+    tables that combine gamma, white balance, brightness and the
+    strip’s channel order, so animations can stay with the colors
+    they mean.
+
+    Any Building, Space, Room, Lamp or Pixel may carry a `correction`
+    attribute with a Correction object that applies to all the pixels
+    it contains. Corrections of inner items override those of outer
+    ones. Pixels not covered use the `default`.
+    """
+    def __init__(self, size:int, default:Correction, order:str="RGB"):
+        super().__init__(size)
+        self.default = Correction(1.0, (1.0, 1.0, 1.0,), 1.0).merged(default)
+        self.order = order.upper()
+        if sorted(self.order) != [ "B", "G", "R", ]:
+            raise ValueError("Channel order must be a permutation of RGB.")
+
+        self._cache = {}
+        self.tables = [ self._tables(self.default) ] * size
+
+    def _tables(self, correction):
+        """
+        Return a tuple of three lists, one for each of the input
+        channels r, g and b, that map the channel’s value to its
+        corrected value already shifted to its position in the output.
+        """
+        key = correction.key
+        if key not in self._cache:
+            ret = []
+            for channel, white in zip("RGB", correction.white):
+                shift = 8 * (2 - self.order.index(channel))
+                factor = white * correction.brightness
+                ret.append([ min(255, round(255 * (a/255) ** correction.gamma
+                                            * factor)) << shift
+                             for a in range(256) ])
+            self._cache[key] = tuple(ret)
+
+        return self._cache[key]
+
+    def install(self, town, item=None):
+        """
+        Look for `correction` attributes in the town. Return the
+        number found. If `item` is given, e.g. a Building swapped into
+        the running town, only its pixels are updated, with the
+        corrections of the items containing it still applied.
+        """
+        found = 0
+        def walk(a, correction, inside):
+            nonlocal found
+            inside = inside or a is item
+            if (c := getattr(a, "correction", None)) is not None:
+                correction = correction.merged(c)
+                if inside:
+                    found += 1
+
+            if isinstance(a, Source):
+                walk(a.light, correction, inside)
+            elif isinstance(a, list):
+                for b in a:
+                    walk(b, correction, inside)
+            elif inside and getattr(a, "idx", None) is not None:
+                self.tables[a.idx] = self._tables(correction)
+
+        walk(town, self.default, item is None)
+        return found
+
+    def process(self, engine, change:Change) -> Change:
+        tables = self.tables
+        ret = Changes([])
+        for idx, color in change.items():
+            r, g, b = tables[idx]
+            ret[idx] = r[color >> 16] | g[(color >> 8) & 0xff] | b[color & 0xff]
+        return ret
+
+def town_calibration(town, size:int) -> Calibration|None:
+    """
+    Return a Calibration with the default Correction and the `town`’s
+    corrections or None if the town has none. Tools that show or
+    simulate a town without animate’s options use this.
+    """
+    calibration = Calibration(size, Correction())
+    if calibration.install(town):
+        return calibration
+    else:
+        return None
+
+def parse_curve(s:str):
+    """
+    Parse a comma separated list of “HH:MM=brightness” or
+    “HH:MM=brightness/kelvin” keyframes for a MasterCurve.
+    """
+    ret = []
+    for keyframe in s.split(","):
+        when, value = keyframe.split("=")
+        hours, minutes = when.split(":")
+        if "/" in value:
+            brightness, kelvin = value.split("/")
+            kelvin = float(kelvin)
+        else:
+            brightness, kelvin = value, None
+        ret.append( (int(hours)*60 + int(minutes), float(brightness), kelvin,) )
+    return ret
+
+def curve_table(keyframes) -> list:
+    """
+    Interpolate (minute of the day, brightness, kelvin) keyframes to
+    a (brightness, kelvin) tuple for each minute of the day. The
+    curve wraps around midnight. Kelvin may be None for no tint.
+    """
+    keyframes = sorted(keyframes)
+    ret = []
+    for minute in range(24*60):
+        before = [ k for k in keyframes if k[0] <= minute ] or keyframes[-1:]
+        after = [ k for k in keyframes if k[0] > minute ] or keyframes[:1]
+        m0, b0, k0 = before[-1]
+        m1, b1, k1 = after[0]
+
+        span = (m1 - m0) % (24*60) or 24*60
+        f = ((minute - m0) % (24*60)) / span
+
+        brightness = round(b0 + (b1 - b0) * f, 3)
+        if k0 is None or k1 is None:
+            kelvin = None
+        else:
+            kelvin = round(k0 + (k1 - k0) * f, -1)
+
+        ret.append( (brightness, kelvin,) )
+
+    return ret
+
+class MasterCurve(OutputStage):
+    """
+    Modulate the brightness and color temperature of the whole town
+    following a curve over the time of day, e.g. from evening to
+    night, and dim it by a global `dim` factor.
+
+    The color temperature tints each channel through a lookup table.
+    Install the MasterCurve before a Calibration so the gamma applies
+    to the tinted colors. The curve is looked up once a second.
+
+    If the strip supports it, the brightness goes to the ws281x
+    hardware brightness and no pixel is recolored for it. The hardware
+    scales the colors as they are sent, after gamma correction, so
+    the brightness isn’t gamma corrected: At .5, a pixel gets half
+    its corrected value. Otherwise the brightness goes into the lookup
+    tables, ahead of the Calibration, and the gamma applies to it: At
+    .5 and a gamma of 2, a pixel gets a quarter of its corrected value.
+    With a gamma above 1, the same curve looks brighter on a strip
+    with hardware brightness.
+    """
+    def __init__(self, size:int, keyframes, dim:float=1.0,
+                 clock=minute_of_day):
+        super().__init__(size)
+        self.table = curve_table(keyframes)
+        self.dim = dim
+        self.clock = clock
+
+        # The minute of the day and the frame to look it up again.
+        self.minute = None
+        self.next_lookup = 0
+
+        self.colors = array.array("I", bytes(4*size))
+        self.entry = None
+        self.tables = None
+        self.hardware_brightness = None
+
+    def _channel_tables(self, brightness:float, kelvin:float|None):
+        if kelvin is None:
+            factors = ( brightness, ) * 3
+        else:
+            tint = temperature_int(kelvin)
+            factors = ( brightness * (tint >> 16) / 255,
+                        brightness * ((tint >> 8) & 0xff) / 255,
+                        brightness * (tint & 0xff) / 255, )
+
+        if factors == ( 1.0, ) * 3:
+            return None
+        else:
+            return tuple([ scale_table(f) for f in factors ])
+
+    def process(self, engine, change:Change) -> Change:
+        colors = self.colors
+        for idx, color in change.items():
+            colors[idx] = color
+
+        if engine.now >= self.next_lookup:
+            self.minute = self.clock()
+            self.next_lookup = engine.now + config.framerate
+
+        brightness, kelvin = self.table[self.minute]
+        entry = ( brightness, kelvin, self.dim, )
+        if entry != self.entry:
+            self.entry = entry
+            brightness *= self.dim
+
+            strip = engine.strip
+            if hasattr(strip, "setBrightness"):
+                if self.hardware_brightness is None:
+                    self.hardware_brightness = strip.getBrightness()
+                strip.setBrightness(round(self.hardware_brightness
+                                          * min(brightness, 1.0)))
+                brightness = 1.0
+
+            previous = self.tables
+            self.tables = self._channel_tables(brightness, kelvin)
+
+            if self.tables is not None:
+                return frame_change(translate_channels(colors, self.tables))
+            elif previous is not None:
+                return frame_change(colors)
+
+        tables = self.tables
+        if tables is None:
+            return change
+        else:
+            r, g, b = tables
+            ret = Changes([])
+            for idx in change.keys():
+                color = colors[idx]
+                ret[idx] = ( r[color >> 16] << 16
+                             | g[(color >> 8) & 0xff] << 8
+                             | b[color & 0xff] )
+            return ret
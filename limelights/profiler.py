@@ -0,0 +1,188 @@
+"""
+Find out which rooms are expensive. The Profiler wraps each Source’s
+changes() generator and accumulates the time spent advancing it and
+the number of changes it yields, per Source and animation, per Room
+class and per Building.
+
+With an `interval` of 1 every advance is timed. With an interval of
+n only every n-th frame computed is timed and the results are scaled
+accordingly, which is cheap enough to leave on.
+"""
+
+import sys, time, collections
+
+from .model import Source, Building
+from .utils import label
+
+def animation_name(animation) -> str:
+    """
+    Return the name of the generator function that created
+    `animation`. limit() and darker() wrap another animation which
+    is the one we are interested in.
+    """
+    while animation.__name__ in { "limit", "darker", }:
+        frame = animation.gi_frame
+        if frame is None or "animation" not in frame.f_locals:
+            break
+        animation = frame.f_locals["animation"]
+
+    return animation.__name__ + "()"
+
+class Stats(object):
+    def __init__(self):
+        self.time = 0.0
+        self.changes = 0
+
+class Profiler(object):
+    """
+    An Engine observer that wraps all the town’s Sources’ changes()
+    methods on install().
+    """
+    def __init__(self, interval:int=1, top:int=15, outfile=sys.stderr):
+        self.interval = interval
+        self.top = top
+        self.outfile = outfile
+
+        # The number of frames since the first one observed, counting
+        # those a stride above 1 skipped, see Engine.stride.
+        self.frames = 0
+        self.first_frame = None
+        self.frametime = 0.0
+
+        # Map (source, animation name) to Stats.
+        self.stats = collections.defaultdict(Stats)
+        self.rooms = {}
+        self.buildings = {}
+
+        self.report_requested = False
+
+        # Map the Sources wrapped by install() to the changes they
+        # had in their __dict__ before, if any.
+        self.sources = {}
+        self.installed = False
+
+    def install(self, engine):
+        def walk(item, room, building):
+            if isinstance(item, Source):
+                self.rooms[item] = room
+                self.buildings[item] = building
+                self.sources[item] = item.__dict__.get("changes")
+                item.changes = self._wrap(item, item.changes)
+            elif isinstance(item, list):
+                if isinstance(item, Building):
+                    building = item
+                for a in item:
+                    walk(a, item, building)
+
+        walk(engine.town, None, None)
+        engine.observers.append(self)
+        self.installed = True
+
+    def uninstall(self, engine):
+        """
+        Restore the Sources’ changes() methods. Generators already
+        running stop measuring.
+        """
+        for source, changes in self.sources.items():
+            if changes is None:
+                # install() shadowed the class’ method.
+                del source.changes
+            else:
+                source.changes = changes
+        self.sources = {}
+
+        if self in engine.observers:
+            engine.observers.remove(self)
+        self.installed = False
+
+    def _wrap(self, source, changes):
+        profiler = self
+        stats = self.stats
+        clock = time.perf_counter
+
+        def profiled_changes():
+            running = changes()
+            animation = None
+            counter = 0
+            while True:
+                if not profiler.installed:
+                    yield from running
+
+                counter += 1
+                if counter < profiler.interval:
+                    yield next(running)
+                else:
+                    counter = 0
+                    start = clock()
+                    change = next(running)
+                    end = clock()
+
+                    if source.animation is not animation:
+                        animation = source.animation
+                        s = stats[(source, animation_name(animation))]
+
+                    s.time += end - start
+                    if change:
+                        s.changes += 1
+
+                    yield change
+
+        return profiled_changes
+
+    def frame(self, engine, change, proctime):
+        if self.first_frame is None:
+            self.first_frame = int(engine.now)
+        self.frames = int(engine.now) + engine.stride - self.first_frame
+        self.frametime += proctime
+
+        if self.report_requested:
+            self.report()
+            self.report_requested = False
+
+    def request_report(self):
+        self.report_requested = True
+
+    def report(self):
+        if not self.frametime:
+            return
+
+        frametime = self.frametime / self.interval
+
+        by_source = collections.defaultdict(Stats)
+        by_class = collections.defaultdict(Stats)
+        by_building = collections.defaultdict(Stats)
+        for (source, name), stats in self.stats.items():
+            room = self.rooms[source]
+            building = self.buildings[source]
+
+            kind = room.__class__.__name__
+            if label(room) == kind:
+                # Unnamed rooms are told apart by their first pixel.
+                first = min(source.indeces, default="–")
+                where = f"{kind} #{first}"
+            else:
+                where = f"{kind} “{label(room)}”"
+
+            keys = (
+                (by_source, f"{where} {name}"),
+                (by_class, f"{room.__class__.__name__} {name}"),
+                (by_building, label(building) if building else "–"),)
+
+            for d, key in keys:
+                d[key].time += stats.time
+                d[key].changes += stats.changes
+
+        def print_table(title, d):
+            print(title, file=self.outfile)
+            items = sorted(d.items(), key=lambda i: -i[1].time)
+            for key, stats in items[:self.top]:
+                print("  %5.1f%% %8i  %s" % (100 * stats.time / frametime,
+                                             stats.changes * self.interval,
+                                             key,), file=self.outfile)
+
+        print(f"{self.frames} frames, "
+              f"{1000*self.frametime/self.frames:.3f}ms per frame, "
+              f"% of frame time and changes:", file=self.outfile)
+        print_table("By source:", by_source)
+        print_table("By room class:", by_class)
+        print_table("By building:", by_building)
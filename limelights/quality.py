@@ -0,0 +1,191 @@
+"""
+Keep a Town that is too heavy for the hardware in time. Without
+help, the Engine overruns each frame and all animations slow down.
+The QualityController watches the share of the frame time spent on
+computing and showing each frame. If it stays above `high` for
+`patience` seconds, quality is lowered by one step, in this order:
+
+1. Rooms that set `precompile` (schedule-type rooms like the
+   HotelRoom) are taken over by a Timeline (see limelights.timeline)
+   and only updated when they change color, unless a Timeline runs
+   already.
+2. tv() and candle() hold each of their flickering colors for two
+   frames and make fewer changes.
+3. The framerate on the strip is lowered by computing and showing
+   every second, third, then fourth frame only (see Engine.stride).
+   Pending holds keep their length in seconds because limit() counts
+   them down by the stride. Waits and fades started from then on are
+   shortened, flickers already running slow down.
+
+When the load stays below `low` for `recovery` seconds, the last step
+is undone. A step that has to be taken again shortly after it was
+undone doubles the time waited before undoing it again. Every step is
+logged.
+"""
+
+import sys
+
+from . import config
+
+class Step(object):
+    def __init__(self, description:str):
+        self.description = description
+
+    def applies(self, engine) -> bool:
+        return True
+
+    def degrade(self, engine) -> bool:
+        """
+        Lower quality. Return False if there was nothing to do.
+        """
+        raise NotImplementedError()
+
+    def restore(self, engine):
+        raise NotImplementedError()
+
+class TimelineStep(Step):
+    def __init__(self, hours:float):
+        super().__init__("schedule-type rooms on a timeline")
+        self.hours = hours
+        self.timeline = None
+
+    def applies(self, engine) -> bool:
+        return engine.timeline is None
+
+    def degrade(self, engine) -> bool:
+        from .timeline import Timeline
+
+        # This runs as an observer, after the current frame.
+        self.timeline = Timeline(engine, self.hours)
+        if self.timeline.install(int(engine.now) + 1) == 0:
+            self.timeline = None
+            return False
+        return True
+
+    def restore(self, engine):
+        if self.timeline is not None:
+            self.timeline.uninstall()
+            self.timeline = None
+
+class FlickerStep(Step):
+    def __init__(self, flicker:int):
+        super().__init__(f"tv() and candle() flicker every {flicker} frames")
+        self.flicker = flicker
+        self.previous = None
+
+    def degrade(self, engine) -> bool:
+        self.previous = config.flicker
+        config.flicker = self.flicker
+        return True
+
+    def restore(self, engine):
+        config.flicker = self.previous
+
+class StrideStep(Step):
+    def __init__(self, stride:int):
+        super().__init__(f"show one frame in {stride}")
+        self.stride = stride
+        self.previous = None
+
+    def degrade(self, engine) -> bool:
+        self.previous = engine.stride
+        engine.stride = self.stride
+        return True
+
+    def restore(self, engine):
+        engine.stride = self.previous
+
+class QualityController(object):
+    """
+    An Engine observer that lowers and restores quality, see above.
+    """
+    def __init__(self, engine, high:float=0.9, low:float=0.5,
+                 patience:float=2.0, recovery:float=30.0,
+                 max_stride:int=4, timeline_hours:float=2.0,
+                 outfile=sys.stderr):
+        self.engine = engine
+        self.high = high
+        self.low = low
+        self.patience = patience
+        self.recovery = recovery
+        self.outfile = outfile
+
+        self.steps = [ TimelineStep(timeline_hours), FlickerStep(2), ]
+        for stride in range(2, max_stride+1):
+            self.steps.append(StrideStep(stride))
+
+        # The steps taken and the time waited before undoing each.
+        self.taken = []
+        self.waits = [ recovery ] * len(self.steps)
+
+        # Seconds the load has been above high or below low.
+        self.over = 0.0
+        self.under = 0.0
+
+        # The frame and level of the last restore().
+        self.restored = None
+
+    def install(self):
+        self.engine.observers.append(self)
+
+    @property
+    def level(self) -> int:
+        return len(self.taken)
+
+    def frame(self, engine, change, proctime):
+        frametime = engine.stride / config.framerate
+        load = proctime / frametime
+
+        if load > self.high:
+            self.over += frametime
+            self.under = 0.0
+            if self.over >= self.patience:
+                self.over = 0.0
+                self.degrade(load)
+        elif load < self.low:
+            self.under += frametime
+            self.over = 0.0
+            if self.taken and self.under >= self.waits[self.level-1]:
+                self.under = 0.0
+                self.restore(load)
+        else:
+            self.over = self.under = 0.0
+
+    def degrade(self, load:float):
+        engine = self.engine
+        for i in range(self.level, len(self.steps)):
+            step = self.steps[i]
+            if not step.applies(engine) or not step.degrade(engine):
+                continue
+
+            # Skipped steps are recorded as None so restore() undoes
+            # the steps in order.
+            self.taken.extend([ None ] * (i - self.level))
+            self.taken.append(step)
+
+            if self.restored is not None:
+                frame, level = self.restored
+                seconds = (engine.now - frame) / config.framerate
+                if level == i and seconds < self.waits[i]:
+                    self.waits[i] = min(2 * self.waits[i], 3600.0)
+
+            self.log(f"lowered to level {self.level}, {step.description}",
+                     load)
+            return
+
+        self.log("overloaded at the lowest quality", load)
+
+    def restore(self, load:float):
+        engine = self.engine
+        while self.taken:
+            step = self.taken.pop()
+            if step is not None:
+                step.restore(engine)
+                self.restored = ( engine.now, self.level, )
+                self.log(f"raised to level {self.level}, "
+                         f"undid {step.description}", load)
+                break
+
+    def log(self, message:str, load:float):
+        print(f"quality: {message} (load {load:.2f}) at frame "
+              f"{self.engine.now}.", file=self.outfile)
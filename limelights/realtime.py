@@ -0,0 +1,36 @@
+"""
+Keep other processes on a busy Raspberry Pi from delaying our
+frames. All of these need root privileges and must be called before
+construct_strip() drops them. Threads and processes started later
+inherit the settings.
+"""
+
+import os
+
+policies = { "fifo": os.SCHED_FIFO,
+             "rr": os.SCHED_RR, }
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+def set_realtime_priority(policy:str, priority:int):
+    """
+    Run this process with the SCHED_FIFO (“fifo”) or SCHED_RR
+    (“rr”) real-time scheduling policy at `priority` (1–99).
+    """
+    os.sched_setscheduler(0, policies[policy], os.sched_param(priority))
+
+def pin_to_cpus(cpus:set[int]):
+    os.sched_setaffinity(0, cpus)
+
+def lock_memory():
+    """
+    Lock all current and future pages of this process into RAM so the
+    output loop will never wait for a page to be swapped in.
+    """
+    import ctypes, ctypes.util
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, "mlockall(): " + os.strerror(errno))
@@ -0,0 +1,192 @@
+"""
+The flight recorder keeps the frames of the last couple of minutes
+in memory so they can be written to disk when something looks
+wrong on the layout. Only the pixels that actually changed from
+one frame to the next are kept. The frames are collected in chunks
+of one second each. When the oldest chunk falls off the end of the
+ring it is applied to a base frame, so the recording can always be
+replayed from a known state.
+
+A flight log file consists of
+- a header (see `log_header` below),
+- the base frame, one 32 bit 0xrrggbb int per pixel,
+- an index with the first frame number, offset and length of each chunk
+- and the chunks of encoded frames themselves.
+"""
+
+import struct, array, collections, math
+
+from . import config
+
+frame_header = struct.Struct("=H")
+
+def encode_frame(change) -> bytes:
+    """
+    Encode a dict of pixel index → color as a pixel count followed
+    by the indeces and the colors.
+    """
+    n = len(change)
+    return struct.pack(f"=H{n}H{n}I", n, *change.keys(), *change.values())
+
+def decode_frames(data):
+    """
+    Yield one dict of pixel index → color for each frame encoded
+    in `data`.
+    """
+    offset = 0
+    length = len(data)
+    while offset < length:
+        n, = frame_header.unpack_from(data, offset)
+        offset += frame_header.size
+        values = struct.unpack_from(f"={n}H{n}I", data, offset)
+        offset += 6*n
+        yield dict(zip(values[:n], values[n:]))
+
+MAGIC = b"LLFR"
+VERSION = 1
+
+# magic, version, pixel count, framerate, first frame, frame count,
+# chunk count
+log_header = struct.Struct("=4sIIIQII")
+
+# first frame, offset, length
+index_entry = struct.Struct("=QQI")
+
+class FlightRecorder(object):
+    """
+    An Engine observer that keeps the last `minutes` of frames in a
+    ring buffer. Call request_dump() to have them written to disk
+    after the current frame. This is safe to call from a signal
+    handler. dump() writes them right away.
+    """
+    def __init__(self, size:int, minutes:float=10):
+        self.size = size
+        self.maxchunks = math.ceil(minutes*60)
+
+        self.previous = array.array("I", bytes(4*size))
+        self.base = array.array("I", bytes(4*size))
+
+        # The chunks are [ first_frame, frame_count, bytearray, ] lists.
+        self.chunks = collections.deque()
+        self.dump_requested = None
+
+        # The number of the frame expected next. Frames a stride above
+        # 1 skipped (see Engine.stride) are recorded without changes.
+        self.next_frame = None
+
+    def frame(self, engine, change, proctime):
+        previous = self.previous
+        delta = { idx: color for idx, color in change.items()
+                  if previous[idx] != color }
+        for idx, color in delta.items():
+            previous[idx] = color
+
+        now = int(engine.now)
+        if self.next_frame is not None:
+            for frame in range(self.next_frame, now):
+                self._append(frame, encode_frame({}))
+        self._append(now, encode_frame(delta))
+        self.next_frame = now + 1
+
+        if self.dump_requested:
+            self.dump(self.dump_requested)
+            self.dump_requested = None
+
+    def _append(self, frame:int, data:bytes):
+        chunks = self.chunks
+        if not chunks or chunks[-1][1] >= config.framerate:
+            chunks.append([ frame, 0, bytearray(), ])
+            if len(chunks) > self.maxchunks:
+                self._evict()
+
+        chunk = chunks[-1]
+        chunk[1] += 1
+        chunk[2] += data
+
+    def _evict(self):
+        first_frame, count, data = self.chunks.popleft()
+        base = self.base
+        for delta in decode_frames(data):
+            for idx, color in delta.items():
+                base[idx] = color
+
+    def request_dump(self, path):
+        self.dump_requested = path
+
+    def dump(self, path):
+        chunks = list(self.chunks)
+        if chunks:
+            first_frame = chunks[0][0]
+        else:
+            first_frame = 0
+
+        offset = ( log_header.size
+                   + 4*self.size
+                   + index_entry.size*len(chunks) )
+
+        with open(path, "wb") as fp:
+            fp.write(log_header.pack(MAGIC, VERSION, self.size,
+                                     config.framerate, first_frame,
+                                     sum([c[1] for c in chunks]),
+                                     len(chunks)))
+            fp.write(self.base.tobytes())
+
+            for first, count, data in chunks:
+                fp.write(index_entry.pack(first, offset, len(data)))
+                offset += len(data)
+
+            for first, count, data in chunks:
+                fp.write(data)
+
+class FlightLog(object):
+    """
+    Read a file written by FlightRecorder.dump().
+    """
+    def __init__(self, path):
+        with open(path, "rb") as fp:
+            self.data = fp.read()
+
+        ( magic, version, self.size, self.framerate,
+          self.first_frame, self.frame_count,
+          chunk_count, ) = log_header.unpack_from(self.data)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a limelights flight log.")
+
+        offset = log_header.size
+        self.base = array.array("I")
+        self.base.frombytes(self.data[offset:offset+4*self.size])
+        offset += 4*self.size
+
+        self.index = [ index_entry.unpack_from(self.data,
+                                               offset + a*index_entry.size)
+                       for a in range(chunk_count) ]
+
+    def frames(self):
+        """
+        Yield (frame number, dict of pixel index → color) tuples
+        for each of the frames recorded.
+        """
+        for first, offset, length in self.index:
+            chunk = self.data[offset:offset+length]
+            for frame, delta in enumerate(decode_frames(chunk), first):
+                yield frame, delta
+
+    def timelines(self, indeces=None):
+        """
+        Return a dict mapping pixel indeces to lists of
+        (frame number, color) tuples, one for each time the pixel
+        changed color, starting with the base frame.
+        """
+        if indeces is None:
+            indeces = range(self.size)
+
+        ret = { idx: [ (self.first_frame, self.base[idx],) ]
+                for idx in indeces }
+
+        for frame, delta in self.frames():
+            for idx, color in delta.items():
+                if idx in ret:
+                    ret[idx].append( (frame, color,) )
+
+        return ret
@@ -0,0 +1,149 @@
+"""
+Reload building modules while the town is running. A ModuleWatcher
+polls the modification times of the module files in a thread of its
+own. When one changes, the thread runs it again and engine_init()s
+the Buildings it makes to the pixels of the ones they replace. If a
+new Building’s pixel layout is the same as the old one’s, the Engine
+swaps it in between two frames. The other Buildings keep running
+undisturbed.
+
+A changed layout needs a restart, as do Buildings a module didn’t
+make before. The Calibration is updated on a swap, the Profiler
+keeps reporting on the Buildings loaded at start.
+"""
+
+import sys, time, types, pathlib, itertools, threading, queue, traceback
+import importlib.machinery, importlib.util
+
+from .basetypes import NameableLights
+from .model import Building, Source
+from .utils import label
+
+def town_layout(town) -> list:
+    """
+    Return a list of (index, names) tuples, one for each pixel in
+    `town` in the order of their indeces. `names` are the names of the
+    items the pixel belongs to, from the building down.
+    """
+    ret = []
+    def walk(item, names):
+        if isinstance(item, Source):
+            walk(item.light, names)
+        elif isinstance(item, list):
+            if isinstance(item, NameableLights) and item is not town:
+                names = names + ( label(item), )
+            for a in item:
+                walk(a, names)
+        elif getattr(item, "idx", None) is not None:
+            ret.append( (item.idx, names,) )
+
+    walk(town, ())
+    return sorted(ret)
+
+def load_module(filepath):
+    """
+    Like cmdline.load_module_from_file() but always compile the
+    source. A .pyc file written by an earlier load might not notice
+    an edit made within the same second.
+    """
+    path = pathlib.Path(filepath)
+    code = compile(path.read_bytes(), str(path), "exec")
+
+    loader = importlib.machinery.SourceFileLoader(path.stem, str(path))
+    spec = importlib.util.spec_from_loader(path.stem, loader)
+    module = importlib.util.module_from_spec(spec)
+    exec(code, module.__dict__)
+
+    return module
+
+class ModuleWatcher(object):
+    def __init__(self, engine, interval:float=1.0,
+                 calibration=None, outfile=sys.stderr):
+        self.engine = engine
+        self.interval = interval
+        self.calibration = calibration
+        self.outfile = outfile
+
+        # Map (module file, identifyer) to the Building running.
+        self.buildings = {}
+        self.mtimes = {}
+        for building in engine.town:
+            path = getattr(building, "module_file", None)
+            if path is not None:
+                self.buildings[(path, building.identifyer,)] = building
+                self.mtimes[path] = self._mtime(path)
+
+        # (old, new) Building pairs ready to be swapped.
+        self.ready = queue.SimpleQueue()
+
+    def install(self):
+        # Reloaded Buildings may bring layers for the Compositor which
+        # needs to know what is on display.
+        self.engine.track_framebuffer = True
+        self.engine.observers.append(self)
+        threading.Thread(target=self.run, daemon=True,
+                         name="ModuleWatcher").start()
+
+    def log(self, message):
+        print("reload:", message, file=self.outfile)
+
+    def _mtime(self, path):
+        try:
+            return pathlib.Path(path).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            for path, mtime in self.mtimes.items():
+                current = self._mtime(path)
+                if current is not None and current != mtime:
+                    self.mtimes[path] = current
+                    self.reload(path)
+
+    def reload(self, path):
+        try:
+            module = load_module(path)
+        except Exception:
+            traceback.print_exc(file=self.outfile)
+            self.log(f"{path} not reloaded.")
+            return
+
+        for identifyer, new in module.__dict__.items():
+            if not isinstance(new, Building):
+                continue
+
+            old = self.buildings.get( (path, identifyer,) )
+            if old is None:
+                self.log(f"{path}: {identifyer} is new, restart to add it.")
+                continue
+
+            new.identifyer = identifyer
+            new.module_file = path
+
+            # Number the new Building’s pixels like the old ones.
+            indeces = old.indeces
+            first = min(indeces) if indeces else 0
+            new.engine_init(types.SimpleNamespace(
+                indeces=itertools.count(first),
+                call_at=self.engine.call_at))
+
+            if town_layout(new) != town_layout(old):
+                self.log(f"{path}: {identifyer}’s pixel layout changed, "
+                         "restart to apply.")
+                continue
+
+            self.ready.put( (old, new,) )
+
+    def frame(self, engine, change, proctime):
+        ready = self.ready
+        while not ready.empty():
+            old, new = ready.get()
+            engine.replace_building(old, new)
+            if self.calibration is not None:
+                self.calibration.install(engine.town, new)
+
+            self.buildings[(new.module_file, new.identifyer,)] = new
+            self.log(f"{new.identifyer} replaced "
+                     f"at frame {engine.now}.")
@@ -0,0 +1,82 @@
+"""
+Animate Buildings only during their hours, e.g. the cinema in the
+evening. The BuildingSchedule checks the clock every `interval`
+seconds and suspends or resumes the Buildings listed in the Town’s
+schedules. A suspended Building’s generators are not advanced at
+all and its pixels are turned off once.
+"""
+
+import sys
+
+from . import config
+from .utils import minute_of_day
+
+def parse_hours(s:str) -> list:
+    """
+    Parse a comma separated list of “HH:MM-HH:MM” ranges into
+    ( start, end, ) tuples in minutes of the day. A range may wrap
+    around midnight.
+    """
+    def minutes(when):
+        hours, minutes = when.split(":")
+        return int(hours)*60 + int(minutes)
+
+    ret = []
+    for part in s.split(","):
+        start, end = part.split("-")
+        ret.append( (minutes(start), minutes(end),) )
+    return ret
+
+def is_active(hours:list, minute:int) -> bool:
+    for start, end in hours:
+        if start <= end:
+            if start <= minute < end:
+                return True
+        elif minute >= start or minute < end:
+            return True
+    return False
+
+class BuildingSchedule(object):
+    def __init__(self, engine, keep:bool=False, interval:float=60.0,
+                 clock=minute_of_day, outfile=sys.stderr):
+        """
+        With `keep` set, Buildings continue their animations where
+        they were suspended, otherwise they start over.
+        """
+        self.engine = engine
+        self.keep = keep
+        self.interval = max(1, int(interval * config.framerate))
+        self.clock = clock
+        self.outfile = outfile
+        self.countdown = 0
+
+    def install(self):
+        # Suspend the Buildings that are off hours before the first
+        # frame.
+        self.check()
+        self.countdown = self.interval
+        self.engine.observers.append(self)
+
+    def check(self):
+        engine = self.engine
+        town = engine.town
+        minute = self.clock()
+        for building, hours in town.schedules:
+            active = is_active(hours, minute)
+            if active == town.is_suspended(building):
+                if active:
+                    engine.resume(building)
+                    verb = "resumed"
+                else:
+                    engine.suspend(building, self.keep)
+                    verb = "suspended"
+                print(f"schedule: {building.name} {verb} "
+                      f"at frame {engine.now}.", file=self.outfile)
+
+    def frame(self, engine, change, proctime):
+        # The Engine may compute several frames per call, see
+        # limelights.quality.
+        self.countdown -= engine.stride
+        if self.countdown <= 0:
+            self.countdown = self.interval
+            self.check()
@@ -0,0 +1,101 @@
+"""
+Publish the Engine’s framebuffer to a memory mapped file so other
+programs (a preview window, a web view, a monitoring agent) may look
+at the running layout without talking to the Engine. On Linux a file
+in /dev/shm is a POSIX shared memory segment.
+
+The file starts with a header followed by one 32 bit 0xrrggbb int
+per pixel in native byte order. The header’s sequence counter works
+like a seqlock: The writer makes it odd before it starts writing and
+even when it is done. A reader copies the data and checks that the
+counter was the same even number before and after.
+"""
+
+import mmap, struct, time, array
+
+from . import config
+
+MAGIC = b"LLFB"
+VERSION = 1
+
+# magic, version, sequence, pixel count, frame, timestamp,
+# processing time, frame time
+header = struct.Struct("=4sIIIQddd")
+sequence = struct.Struct("=I")
+SEQUENCE_OFFSET = 8
+
+class FramebufferPublisher(object):
+    """
+    An Engine observer that copies the framebuffer and the frame’s
+    timing information to `path` after each frame.
+    """
+    def __init__(self, path, size:int):
+        self.path = path
+        self.size = size
+        self.sequence = 0
+
+        length = header.size + 4*size
+        with open(path, "w+b") as fp:
+            fp.truncate(length)
+            self.mmap = mmap.mmap(fp.fileno(), length)
+
+        self.mmap[:header.size] = header.pack(MAGIC, VERSION, 0, size,
+                                              0, 0.0, 0.0, 0.0)
+
+    def install(self, engine):
+        engine.track_framebuffer = True
+        engine.observers.append(self)
+
+    def frame(self, engine, change, proctime):
+        mm = self.mmap
+
+        self.sequence += 1
+        sequence.pack_into(mm, SEQUENCE_OFFSET, self.sequence)
+
+        header.pack_into(mm, 0, MAGIC, VERSION, self.sequence, self.size,
+                         engine.now, time.time(),
+                         proctime, 1 / config.framerate)
+        mm[header.size:] = engine.framebuffer.tobytes()
+
+        self.sequence += 1
+        sequence.pack_into(mm, SEQUENCE_OFFSET, self.sequence)
+
+    def close(self):
+        self.mmap.close()
+
+class FramebufferReader(object):
+    def __init__(self, path):
+        with open(path, "rb") as fp:
+            self.mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = header.unpack_from(self.mmap)[:2]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a limelights framebuffer.")
+
+    def read(self, retries=100):
+        """
+        Return a consistent (frame, timestamp, proctime, frametime,
+        colors) tuple. `colors` is an array of 0xrrggbb ints. While
+        the Engine is writing, wait a little longer each time.
+        """
+        mm = self.mmap
+        delay = 0.0001
+        for a in range(retries):
+            (magic, version, before, size,
+             frame, timestamp, proctime, frametime) = header.unpack_from(mm)
+            if not before & 1:
+                data = mm[header.size:header.size+4*size]
+                after, = sequence.unpack_from(mm, SEQUENCE_OFFSET)
+                if before == after:
+                    colors = array.array("I")
+                    colors.frombytes(data)
+                    return frame, timestamp, proctime, frametime, colors
+
+            time.sleep(delay)
+            delay = min(2*delay, 0.01)
+
+        raise TimeoutError("The framebuffer is being written to "
+                           "all the time.")
+
+    def close(self):
+        self.mmap.close()
@@ -0,0 +1,337 @@
+"""
+Simulate a Town for days or months without computing its frames to
+see how often and how long its rooms are lit and how much current
+they draw. Like the Timeline compiler (see limelights.timeline) the
+Simulation skips over holds: limit(on(…), …) costs the same whether
+it holds for a second or an hour. Other animations like tv() and
+candle() are only sampled for their colors, frame by frame. The
+Sources are advanced in the order of time so Spaces that set other
+Sources’ animations (like the Flat in examples/hotel_schwan.py) work
+as they do live. The Engine’s call_at() calls, e.g. from
+Source.send(), run at their frames, too.
+
+TRANSPARENT counts as dark: On the base layer it is off, on the
+others it shows nothing. Colors and currents are those after a
+Calibration, if one is given, like on the strip.
+"""
+
+import sys, heapq, statistics, collections
+from itertools import islice
+
+from . import config
+from .basetypes import RDuration
+from .compositing import opaque
+from .model import Source, Building
+from .profiler import animation_name
+from .timeline import constant
+from .utils import label
+
+class Segment(object):
+    def __init__(self, start:int, end:int, mode:str|None, lit:float,
+                 current:float, colors:list):
+        self.start = start
+        self.end = end
+        self.mode = mode
+
+        # The fraction of the frames that are lit.
+        self.lit = lit
+
+        # The color shown or the average of the colors sampled, one
+        # for each of the Source’s pixel groups, see SourceState.
+        self.colors = colors
+
+        # Average current per pixel in mA.
+        self.current = current
+
+class SourceState(object):
+    def __init__(self, source, room, building, calibration=None):
+        self.source = source
+        self.room = room
+        self.building = building
+        self.pixels = len(source.indeces)
+
+        # ( calibration tables, [ indeces ], ) for each group of the
+        # Source’s pixels that are corrected alike. The tables are None
+        # without a Calibration.
+        groups = {}
+        for idx in source.indeces:
+            tables = None if calibration is None else calibration.tables[idx]
+            groups.setdefault(id(tables), ( tables, [], ))[1].append(idx)
+        self.groups = list(groups.values())
+
+        self.animations = None
+        self.generation = 0
+        self.segments = []
+
+        # The color last shown.
+        self.color = 0
+
+class Simulation(object):
+    def __init__(self, engine, channel:float=20.0, idle:float=1.0,
+                 sample:float=10.0, cap:float=3600.0, calibration=None):
+        """
+        Simulate the Town of `engine`, which must not be animated.
+        `channel` and `idle` are the currents a pixel draws per color
+        channel at full brightness and when dark. Animations other
+        than holds are sampled for `sample` seconds. Those without a
+        limit() are followed for up to `cap` seconds and assumed to
+        run forever if they don’t end by then. The colors are
+        corrected by `calibration`, a limelights.output.Calibration
+        in RGB order, if given.
+        """
+        self.channel = channel
+        self.idle = idle
+        self.sample = max(1, int(sample * config.framerate))
+        self.cap = max(1, int(cap * config.framerate))
+
+        self.engine = engine
+        self.states = {}
+        def walk(item, room, building):
+            if isinstance(item, Source):
+                self.states[item] = SourceState(item, room, building,
+                                                calibration)
+            elif isinstance(item, list):
+                if isinstance(item, Building):
+                    building = item
+                for a in item:
+                    walk(a, item, building)
+        walk(engine.town, None, None)
+
+        self.now = 0
+        self.frames = 0
+        self._heap = []
+        self._counter = 0
+
+    def current(self, color:int) -> float:
+        if not color:
+            return self.idle
+        else:
+            return self.idle + self.channel * ( (color >> 16)
+                                                + ((color >> 8) & 0xff)
+                                                + (color & 0xff) ) / 255
+
+    def shown(self, state, colors:list) -> tuple:
+        """
+        Return the average current per pixel of `state`’s Source and
+        the average color of each of its pixel groups over `colors`,
+        the colors it shows frame by frame.
+        """
+        n = len(colors)
+        current = 0.0
+        averages = []
+        for tables, indeces in state.groups:
+            if tables is None:
+                corrected = colors
+            else:
+                r, g, b = tables
+                corrected = [ r[c >> 16] | g[(c >> 8) & 0xff] | b[c & 0xff]
+                              for c in colors ]
+
+            current += len(indeces) * sum(map(self.current, corrected)) / n
+            red = sum([ c >> 16 for c in corrected ]) // n
+            green = sum([ (c >> 8) & 0xff for c in corrected ]) // n
+            blue = sum([ c & 0xff for c in corrected ]) // n
+            averages.append(red << 16 | green << 8 | blue)
+
+        if state.pixels:
+            current /= state.pixels
+        return current, averages
+
+    def _schedule(self, state, frame:int):
+        self._counter += 1
+        heapq.heappush(self._heap, (frame, self._counter,
+                                    state.generation, state,))
+
+    def run(self, frames:int):
+        """
+        Simulate `frames` frames from the start.
+        """
+        self.frames = frames
+        engine = self.engine
+        heap = self._heap
+
+        for state in self.states.values():
+            state.source.observer = self
+            self._schedule(state, 0)
+
+        try:
+            while heap or engine.next_call is not None:
+                due = engine.next_call
+                if due is not None and ( not heap or due <= heap[0][0] ):
+                    # Calls run before the Sources advance in their frame.
+                    if due >= frames:
+                        break
+                    self.now = int(due)
+                    engine.advance_to(due)
+                    continue
+
+                frame, counter, generation, state = heapq.heappop(heap)
+                if frame >= frames or generation != state.generation:
+                    continue
+
+                self.now = frame
+                engine.advance_to(frame)
+                end = self.advance(state, frame)
+                if end is not None:
+                    self._schedule(state, end)
+        finally:
+            for state in self.states.values():
+                state.source.observer = None
+
+    def animations_set(self, source):
+        # Called by the Source when its animations are set: Cut the
+        # current segment short and start over.
+        state = self.states[source]
+        if state.segments and state.segments[-1].end > self.now:
+            state.segments[-1].end = self.now
+        state.animations = None
+        state.generation += 1
+        self._schedule(state, self.now)
+
+    def advance(self, state, start:int) -> int|None:
+        """
+        Run the next animation of `state`’s Source and record it.
+        Return the frame it ends on or None if it doesn’t.
+        """
+        generation = state.generation
+        animation = None
+        if state.animations is not None:
+            animation = next(state.animations, None)
+        if animation is None:
+            state.animations = state.source.animations()
+            animation = next(state.animations, None)
+            if animation is None:
+                return None
+
+        if generation != state.generation:
+            # The Source’s own animations() set its animations.
+            return None
+
+        name = getattr(animation, "__name__", None)
+        inner = animation
+        frames = None
+        if name == "limit" and animation.gi_frame is not None:
+            f_locals = animation.gi_frame.f_locals
+            inner = f_locals["animation"]
+            frames = f_locals["duration"]
+            if isinstance(frames, RDuration):
+                frames = frames.randomize()
+            if config.speed != 1:
+                frames = int(frames/config.speed)
+            if frames <= 0:
+                frames = None
+
+        if getattr(inner, "__name__", None) in constant:
+            color = opaque(next(inner))
+            mode = None
+            lit = 1.0 if color else 0.0
+            current, averages = self.shown(state, [ color ])
+            state.color = color
+        else:
+            mode = animation_name(inner)
+            if frames is None:
+                # Follow it up to the cap to see if it ends.
+                colors = list(islice(inner, self.cap))
+                if len(colors) < self.cap:
+                    frames = len(colors)
+            else:
+                colors = list(islice(inner, min(frames, self.sample)))
+
+            shown = []
+            color = state.color
+            for c in colors:
+                if c is not None:
+                    color = opaque(c)
+                shown.append(color)
+            state.color = color
+
+            if shown:
+                lit = sum([ 1 for c in shown if c ]) / len(shown)
+            else:
+                lit = 1.0 if color else 0.0
+                shown = [ color ]
+            current, averages = self.shown(state, shown)
+
+        end = self.frames if frames is None else start + frames
+        state.segments.append(Segment(start, min(end, self.frames),
+                                      mode, lit, current, averages))
+
+        if frames is None:
+            return None
+        else:
+            return end
+
+def spells(segments):
+    """
+    Merge consecutive `segments` that are both lit or both dark. A
+    segment is lit if any of its frames is, like a flickering tv().
+    Return two lists with the lengths of the lit and dark spells in
+    frames.
+    """
+    lit, dark = [], []
+    current = None
+    length = 0
+    for segment in segments:
+        if segment.end <= segment.start:
+            continue
+        if (segment.lit > 0) is not current and length:
+            (lit if current else dark).append(length)
+            length = 0
+        current = segment.lit > 0
+        length += segment.end - segment.start
+    if length:
+        (lit if current else dark).append(length)
+    return lit, dark
+
+def report(simulation, voltage:float=5.0, outfile=sys.stdout):
+    frames = simulation.frames
+    days = frames / (config.framerate * 86400)
+    minutes = 60 * config.framerate
+
+    def describe(lengths):
+        if not lengths:
+            return "%5s %6s %6s %6s %6s" % ("0", "–", "–", "–", "–",)
+        if len(lengths) > 1:
+            p10, p50, p90 = [ q / minutes for q in statistics.quantiles(
+                lengths, n=10)[0::4] ]
+        else:
+            p10 = p50 = p90 = lengths[0] / minutes
+        return "%5i %6.1f %6.1f %6.1f %6.1f" % (
+            len(lengths), statistics.mean(lengths) / minutes, p10, p50, p90,)
+
+    print(f"{days:.1f} days at {config.framerate} fps, spells in minutes "
+          "(count, mean, 10%, 50%, 90%), energy at "
+          f"{voltage:g} V:", file=outfile)
+    print("%6s  %-32s %-32s %8s  %s" % ("lit", "lit spells", "dark spells",
+                                        "Wh/day", "room",), file=outfile)
+
+    total_energy = 0.0
+    for state in simulation.states.values():
+        segments = state.segments
+        lit_spells, dark_spells = spells(segments)
+
+        lit = sum( (s.end - s.start) * s.lit for s in segments )
+        charge = sum( (s.end - s.start) * s.current for s in segments ) \
+            * state.pixels
+        if state.source.layer == 0:
+            # Layers show on top of another Source’s pixels.
+            energy = charge / (config.framerate * 3600) * voltage / 1000
+            total_energy += energy
+        else:
+            energy = 0.0
+
+        modes = collections.Counter([ s.mode for s in segments
+                                      if s.mode is not None ])
+        modes = ", ".join([ f"{mode} {count/days:.1f}/day"
+                            for mode, count in modes.most_common() ])
+
+        print("%5.1f%%  %s %s %8.2f  %s / %s%s" % (
+            100 * lit / frames if frames else 0,
+            describe(lit_spells), describe(dark_spells),
+            energy / days if days else 0,
+            label(state.building) if state.building else "–",
+            label(state.room),
+            f" ({modes})" if modes else ""), file=outfile)
+
+    print(f"Total {total_energy / days if days else 0:.2f} Wh/day",
+          file=outfile)
@@ -0,0 +1,274 @@
+"""
+The pixel strips the Engine writes to. A strip backend is constructed
+like rpi_ws281x’s PixelStrip and has its begin(), show(), len() and
+item access. Each frame is written through write_ranges() with one
+( first index, colors, ) tuple per run of consecutive pixels changed
+or, if an output stage rewrote the whole frame, through
+write_frame() with an array of 0xrrggbb colors. StripBackend
+implements both through item access for backends that can’t do
+better. Backends that gain nothing from runs set `ranges` to False
+and get the changed pixels through write_pixels() instead, which
+saves sorting them.
+
+construct_strip() in limelights.cmdline looks backends up by name in
+`backends`.
+"""
+
+import sys, array, time
+
+try:
+    import rpi_ws281x
+except ImportError:
+    rpi_ws281x = None
+
+from .basetypes import Time
+from .ws281x import wire_time
+
+class StripBackend(object):
+    # Whether write_ranges() does better than one write per pixel.
+    ranges = True
+
+    def __init__(self, size:int, gpio:int=18, led_freq:int=800000,
+                 dma:int=10, invert:bool=False, brightness:int=255,
+                 channel:int=0, strip_type:str|None=None):
+        self.size = size
+
+    def begin(self):
+        pass
+
+    def show(self):
+        pass
+
+    def __len__(self):
+        return self.size
+
+    def write_frame(self, buffer:array.array):
+        """
+        Set the pixels to the 0xrrggbb colors in `buffer`, starting
+        with the first one.
+        """
+        self.write_ranges([ ( 0, buffer, ), ])
+
+    def write_ranges(self, ranges:list):
+        """
+        `ranges` is a list of ( first index, colors, ) tuples.
+        """
+        for first, colors in ranges:
+            for idx, color in enumerate(colors, first):
+                self[idx] = color
+
+    def write_pixels(self, items):
+        """
+        `items` is an iterable of ( index, color, ) tuples in any
+        order.
+        """
+        for idx, color in items:
+            self[idx] = color
+
+if rpi_ws281x is not None:
+    import ctypes
+
+    class WS281xStrip(rpi_ws281x.PixelStrip, StripBackend):
+        """
+        rpi_ws281x’s PixelStrip copying frames and ranges into the
+        channel’s LED buffer with memmove(). Its own slice setter calls
+        ws2811_led_set() once per pixel. `strip_type` is the name of
+        one of rpi_ws281x’s WS2811_STRIP_* channel orders, e.g. “GRB”.
+        """
+        def __init__(self, *args, strip_type:str|None=None, **kw):
+            if strip_type is not None:
+                strip_type = getattr(rpi_ws281x.ws,
+                                     "WS2811_STRIP_" + strip_type)
+            super().__init__(*args, strip_type=strip_type, **kw)
+
+            # The address of the LED buffer, allocated by begin().
+            self._leds_address = None
+
+        def begin(self):
+            super().begin()
+            leds = rpi_ws281x.ws.ws2811_channel_t_leds_get(self._channel)
+            self._leds_address = int(leds)
+
+        def _copy(self, first:int, colors):
+            colors = colors[:max(0, self.size - first)]
+            if not isinstance(colors, array.array) or colors.typecode != "I":
+                colors = array.array("I", colors)
+            ctypes.memmove(self._leds_address + 4*first,
+                           colors.buffer_info()[0], 4*len(colors))
+
+        def write_frame(self, buffer:array.array):
+            if self._leds_address is None:
+                self[0:len(buffer)] = buffer
+            else:
+                self._copy(0, buffer)
+
+        def write_ranges(self, ranges:list):
+            if self._leds_address is None:
+                for first, colors in ranges:
+                    self[first:first+len(colors)] = colors
+            else:
+                for first, colors in ranges:
+                    self._copy(first, colors)
+
+class ArrayStrip(StripBackend):
+    """
+    Keep the colors in an array of 0xrrggbb ints.
+    """
+    ranges = False
+
+    def __init__(self, size:int, *args, **kw):
+        super().__init__(size)
+        self.colors = array.array("I", bytes(4*size))
+
+    def __getitem__(self, idx):
+        return self.colors[idx]
+
+    def __setitem__(self, idx, color):
+        self.colors[idx] = color
+
+    def write_frame(self, buffer:array.array):
+        self.colors[0:len(buffer)] = array.array("I", buffer)
+
+    def write_ranges(self, ranges:list):
+        colors = self.colors
+        for first, run in ranges:
+            colors[first:first+len(run)] = array.array("I", run)
+
+    def write_pixels(self, items):
+        colors = self.colors
+        for idx, color in items:
+            colors[idx] = color
+
+class DebugPixelStrip(ArrayStrip):
+    def __init__(self, size:int, *args, **kw):
+        # We ignore the other parameters.
+        super().__init__(size)
+        self.outfile = sys.stdout
+        self.now = Time(0)
+
+    def print(self, *args, **kw):
+        kw["file"] = self.outfile
+        print(*args, **kw)
+
+class CountingStrip(ArrayStrip):
+    """
+    Count the calls made to write the colors and the bytes they
+    would take on the wire. Changes come in runs, as they would to
+    WS281xStrip.
+    """
+    ranges = True
+
+    def __init__(self, size:int, *args, **kw):
+        super().__init__(size)
+        self.calls = 0
+        self.pixels = 0
+        self.shows = 0
+
+    @property
+    def bytes(self) -> int:
+        return 3 * self.pixels
+
+    def __setitem__(self, idx, color):
+        self.calls += 1
+        self.pixels += 1
+        self.colors[idx] = color
+
+    def write_frame(self, buffer:array.array):
+        self.calls += 1
+        self.pixels += len(buffer)
+        super().write_frame(buffer)
+
+    def write_ranges(self, ranges:list):
+        for first, run in ranges:
+            self.calls += 1
+            self.pixels += len(run)
+        super().write_ranges(ranges)
+
+    def write_pixels(self, items):
+        for idx, color in items:
+            self[idx] = color
+
+    def show(self):
+        self.shows += 1
+
+def peripheral(gpio:int) -> str:
+    """
+    Return the name of the peripheral rpi_ws281x generates the signal
+    on `gpio` with.
+    """
+    if gpio == 10:
+        return "spi"
+    elif gpio in { 21, 31, }:
+        return "pcm"
+    else:
+        return "pwm"
+
+class SignalBlock(object):
+    """
+    A peripheral or DMA channel that sends one strip’s colors at a
+    time.
+    """
+    def __init__(self, name:str):
+        self.name = name
+
+        # The clock time the last transfer ends.
+        self.busy_until = 0.0
+
+# Map peripheral names and “dma<n>” to SignalBlocks shared by the
+# SimulatedStrips.
+signal_blocks = {}
+
+def signal_block(name:str) -> SignalBlock:
+    if name not in signal_blocks:
+        signal_blocks[name] = SignalBlock(name)
+    return signal_blocks[name]
+
+class SimulatedStrip(ArrayStrip):
+    """
+    A strip that takes as long to show() as a ws281x strip on a
+    Raspberry Pi: 24 bits per pixel at `led_freq` and the reset time
+    (see limelights.ws281x). Strips on the same peripheral (e.g. the
+    two PWM channels) or DMA channel send one after the other, so a
+    show() waits for the transfers still running on either.
+
+    If `blocking` is set, show() sleeps until its transfer is done.
+    Otherwise it returns right away and only keeps the books.
+    """
+    def __init__(self, size:int, gpio:int=18, led_freq:int=800000,
+                 dma:int=10, invert:bool=False, brightness:int=255,
+                 channel:int=0, strip_type:str|None=None,
+                 blocking:bool=True,
+                 clock=time.monotonic, sleep=time.sleep):
+        super().__init__(size)
+        self.wire_time = wire_time(size, led_freq)
+        self.blocks = ( signal_block(peripheral(gpio)),
+                        signal_block(f"dma{dma}"), )
+        self.blocking = blocking
+        self.clock = clock
+        self.sleep = sleep
+
+        self.shows = 0
+
+        # Seconds spent sending and waiting for other transfers.
+        self.busy = 0.0
+        self.waited = 0.0
+
+    def show(self):
+        now = self.clock()
+        start = max(now, *[ block.busy_until for block in self.blocks ])
+        end = start + self.wire_time
+        for block in self.blocks:
+            block.busy_until = end
+
+        self.shows += 1
+        self.busy += self.wire_time
+        self.waited += start - now
+
+        if self.blocking:
+            self.sleep(end - now)
+
+backends = { "debug": DebugPixelStrip,
+             "counting": CountingStrip,
+             "simulated": SimulatedStrip, }
+if rpi_ws281x is not None:
+    backends["ws281x"] = WS281xStrip
@@ -0,0 +1,344 @@
+"""
+Rooms like the HotelRoom or the Stairwell make a random decision and
+then hold a color for minutes. Advancing their generators frame by
+frame is a waste of time. A Timeline expands the animations() of the
+Rooms that set `precompile` into a sorted list of events, one for
+each frame a Source changes color, for the next `hours`. The Engine
+walks that list with a cursor, and the Rooms’ Sources leave the
+regular path through the Spaces’ changes().
+
+Only limit(on(…), …) and limit(off(), …) holds and unlimited on() and
+off() can be compiled. Other limited animations like tv() or candle()
+are run live for their duration. After an unlimited animation the
+compiler can’t predict, the Source is run live from then on.
+
+The next window is compiled while the current one is halfway
+through, one Source per frame. This happens in the Engine’s thread:
+The animations draw from the random module’s shared generator, and
+a thread of its own would make its draws interleave with the main
+loop’s differently on every run. Setting a compiled Source’s animations puts it
+back on the live path. Changes to config.speed apply to windows
+compiled after them.
+
+A Timeline installed while the Engine runs (see limelights.quality)
+restarts the Sources’ animations with the next frame and can be
+uninstalled again. A Building resumed by the Engine (see
+limelights.schedule) has its Sources taken over again. Uninstalling
+restarts the Buildings whose Sources were taken before their
+changes() ran.
+"""
+
+import array
+from itertools import islice, repeat
+
+from . import config
+from .basetypes import Change, RDuration
+from .compositing import opaque
+
+# The names of the animations that yield their color once and then
+# None forever.
+constant = { "on", "off", }
+
+_end = object()
+
+def resume(source, animation, animations):
+    """
+    Yield the colors `source` would have shown from `animation` on.
+    """
+    yield from animation
+    for animation in animations:
+        yield from animation
+    while True:
+        for animation in source.animations():
+            yield from animation
+
+class SourceCompiler(object):
+    def __init__(self, source, frame:int=0):
+        self.source = source
+        self.animations = iter(())
+        self.frame = frame
+        self.done = False
+
+    def compile(self, end:int, events:list):
+        """
+        Append ( frame, source, Change or iterator of colors, ) tuples
+        to `events` up to frame `end`.
+        """
+        source = self.source
+        while self.frame < end and not self.done:
+            animation = next(self.animations, None)
+            if animation is None:
+                # Like Source.changes(), start over.
+                self.animations = source.animations()
+                animation = next(self.animations, None)
+                if animation is None:
+                    self.done = True
+                    break
+
+            name = getattr(animation, "__name__", None)
+
+            if name in constant:
+                events.append( (self.frame, source,
+                                source.light.change_to(opaque(next(animation))),) )
+                self.done = True
+                break
+
+            frames = 0
+            if name == "limit" and animation.gi_frame is not None:
+                f_locals = animation.gi_frame.f_locals
+                inner = f_locals["animation"]
+                frames = f_locals["duration"]
+                if isinstance(frames, RDuration):
+                    frames = frames.randomize()
+                if config.speed != 1:
+                    frames = int(frames/config.speed)
+
+            if frames > 0:
+                if getattr(inner, "__name__", None) in constant:
+                    payload = source.light.change_to(opaque(next(inner)))
+                else:
+                    payload = islice(inner, frames)
+                events.append( (self.frame, source, payload,) )
+                self.frame += frames
+            else:
+                events.append( (self.frame, source,
+                                resume(source, animation, self.animations),) )
+                self.done = True
+
+class Timeline(object):
+    def __init__(self, engine, hours:float=2.0):
+        self.engine = engine
+        self.window = max(1, int(hours * 3600 * config.framerate))
+
+        self.compilers = []
+
+        # The current window’s events as parallel lists.
+        self.frames = array.array("Q")
+        self.sources = []
+        self.payloads = []
+        self.cursor = 0
+        self.end = 0
+
+        # The compilers still to run and the events compiled so far
+        # for the next window, and that window once it’s done.
+        self._pending = None
+        self._next = None
+
+        # Map Sources run live to an iterator of their colors.
+        self.live = {}
+
+        # The slots of the Sources taken over while the Engine runs
+        # and the Buildings of those taken before, see uninstall().
+        self._slots = {}
+        self._restart = {}
+
+    def install(self, start:int|None=None) -> int:
+        """
+        Take over the Sources of the Rooms that set `precompile`
+        except those of suspended Buildings. Return the number of
+        Sources taken over. `start` is the first frame compiled, by
+        default the Engine’s current one. An observer installing the
+        Timeline passes the next.
+        """
+        town = self.engine.town
+        if start is None:
+            start = int(self.engine.now)
+
+        for building in town:
+            if not town.is_suspended(building):
+                self._walk(building, building, start, True)
+
+        if self.compilers:
+            self._set_window(self._compile(start, start + self.window))
+            self.engine.timeline = self
+
+        return len(self.compilers)
+
+    def resume(self, building, start:int) -> int:
+        """
+        Take over the Sources of `building`, which the Engine resumed,
+        from frame `start` on, before its new changes() run. Return
+        the number of Sources taken over.
+        """
+        count = len(self.compilers)
+        self._walk(building, building, start, False)
+        compilers = self.compilers[count:]
+        if not compilers:
+            return 0
+
+        events = []
+        for compiler in compilers:
+            compiler.compile(self.end, events)
+        cursor = self.cursor
+        events.extend(zip(self.frames[cursor:], self.sources[cursor:],
+                          self.payloads[cursor:]))
+        self._set_window(self._window(events, self.end))
+
+        # Add them to the next window, too, if it’s under way.
+        if self._next is not None:
+            frames, sources, payloads, end = self._next
+            events = list(zip(frames, sources, payloads))
+            for compiler in compilers:
+                compiler.compile(end, events)
+            self._next = self._window(events, end)
+        elif self._pending is not None:
+            self._pending[0].extend(compilers)
+
+        return len(compilers)
+
+    def _walk(self, item, building, start:int, running:bool):
+        if getattr(item, "precompile", False):
+            for source in item:
+                if ( getattr(source, "light", None) is not None
+                     and not source.layer and not source.fade
+                     and source.timeline is None ):
+                    self._take(source, building, start, running)
+        elif isinstance(item, list):
+            for a in item:
+                self._walk(a, building, start, running)
+
+    def _take(self, source, building, start:int, running:bool):
+        if running and source._slot is not None:
+            # The Engine is running: Keep the Space from advancing the
+            # Source’s changes().
+            container, key = source._slot
+            container[key] = repeat(None)
+            self._slots[source] = source._slot
+        else:
+            # Its Space will leave it out when it starts.
+            self._restart[id(building)] = building
+
+        source.timeline = self
+        self.compilers.append(SourceCompiler(source, start))
+
+    def uninstall(self):
+        """
+        Hand the Sources taken over while the Engine ran back to
+        their Spaces. Those still compiled start their animations
+        over. The Buildings of the Sources taken before their Spaces
+        ran restart as a whole.
+        """
+        self._pending = None
+        self._next = None
+
+        sources = [ c.source for c in self.compilers ] + list(self.live)
+        for source in dict.fromkeys(sources):
+            slot = self._slots.get(source)
+            changes = None
+            if source.timeline is None:
+                # Released, this is its changes() generator.
+                changes = self.live.get(source)
+
+            self.forget(source)
+            if slot is not None:
+                container, key = slot
+                source._slot = slot
+                container[key] = changes or source.changes()
+
+        self._slots.clear()
+        if self.engine.timeline is self:
+            self.engine.timeline = None
+
+        town = self.engine.town
+        for building in self._restart.values():
+            if ( any([ b is building for b in town ])
+                 and not town.is_suspended(building) ):
+                town.replace(building, building)
+        self._restart.clear()
+
+    def _compile(self, start:int, end:int):
+        events = []
+        for compiler in list(self.compilers):
+            compiler.compile(end, events)
+        return self._window(events, end)
+
+    def _compile_step(self):
+        """
+        Run the next pending compiler for the next window.
+        """
+        if self._next is not None:
+            return
+
+        if self._pending is None:
+            self._pending = ( list(self.compilers), [], )
+        compilers, events = self._pending
+        end = self.end + self.window
+        if compilers:
+            compilers.pop(0).compile(end, events)
+        if not compilers:
+            self._next = self._window(events, end)
+            self._pending = None
+
+    def _window(self, events:list, end:int):
+        events.sort(key=lambda event: event[0])
+
+        return ( array.array("Q", [ event[0] for event in events ]),
+                 [ event[1] for event in events ],
+                 [ event[2] for event in events ],
+                 end, )
+
+    def _set_window(self, window):
+        self.frames, self.sources, self.payloads, self.end = window
+        self.cursor = 0
+
+    def release(self, source):
+        """
+        Run `source` live from the next frame on.
+        """
+        self.forget(source)
+        source._slot = ( self.live, source, )
+        self.live[source] = source.changes()
+
+    def forget(self, source):
+        source.timeline = None
+        self.live.pop(source, None)
+        self.compilers = [ c for c in self.compilers if c.source is not source ]
+
+    def step(self, now:int, change:Change):
+        """
+        Add the changes of frame `now` to `change`.
+        """
+        if self.live:
+            for source, colors in list(self.live.items()):
+                color = next(colors, _end)
+                if color is _end:
+                    del self.live[source]
+                elif color is None:
+                    pass
+                elif source.timeline is None:
+                    # Released, this yields Changes.
+                    change.update(color)
+                else:
+                    change.update(source.light.change_to(opaque(color)))
+
+        frames = self.frames
+        cursor = self.cursor
+        count = len(frames)
+        while cursor < count and frames[cursor] <= now:
+            source = self.sources[cursor]
+            payload = self.payloads[cursor]
+            cursor += 1
+
+            if source.timeline is not self:
+                continue
+            elif isinstance(payload, Change):
+                # A live payload may outlast its frames with a stride
+                # above 1.
+                self.live.pop(source, None)
+                change.update(payload)
+            else:
+                self.live[source] = payload
+                color = next(payload, None)
+                if color is not None:
+                    change.update(source.light.change_to(opaque(color)))
+        self.cursor = cursor
+
+        # Compile the next window while this one is halfway through.
+        if now >= self.end - self.window // 2:
+            self._compile_step()
+
+        if now + 1 >= self.end:
+            while self._next is None:
+                self._compile_step()
+            self._set_window(self._next)
+            self._next = None
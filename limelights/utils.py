@@ -1,3 +1,5 @@
+import time
+
 def clear():
     """
     Clear screen
@@ -9,3 +11,19 @@ def home():
     Move cursor to the top left corner of the terminal.
     """
     print(end="\033[H")
+
+def label(item) -> str:
+    """
+    Return `item`’s name or its class name if it wasn’t given one.
+    The default names contain the item’s id() which changes from one
+    run to the next.
+    """
+    name = item.name
+    if name is None or name == f"{item.__class__.__name__} 0x{id(item):x}":
+        return item.__class__.__name__
+    else:
+        return name
+
+def minute_of_day() -> int:
+    now = time.localtime()
+    return now.tm_hour * 60 + now.tm_min
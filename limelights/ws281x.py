@@ -0,0 +1,17 @@
+"""
+Timing of the ws281x protocol. Each pixel receives 24 bits, each bit
+taking one period of the LED signal frequency. After the last pixel
+the line is held low for the reset time to latch the colors.
+"""
+
+BITS_PER_PIXEL = 24
+
+# rpi_ws281x holds the line low for this long after each render.
+RESET_TIME = 55e-6
+
+def wire_time(pixels:int, led_freq:int=800000) -> float:
+    """
+    Return the number of seconds it takes to send the colors for
+    `pixels` pixels down the wire at `led_freq` Hz.
+    """
+    return pixels * BITS_PER_PIXEL / led_freq + RESET_TIME
@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from limelights import config
+from limelights.control import ControlServer, ControlError, Command
+from limelights.engine import Engine
+from limelights.model import Town, Building, Room
+
+def server() -> ControlServer:
+    engine = Engine(Town(Building("Hotel", Room("Lobby"))))
+    return ControlServer(engine, "/nonexistent", outfile=io.StringIO())
+
+def run(server:ControlServer, *words) -> str:
+    command = Command(list(words))
+    server.commands.put(command)
+    server.frame(server.engine, {}, 0.0)
+    return command.reply
+
+def test_arguments():
+    s = server()
+    with pytest.raises(ControlError, match="Wrong number"):
+        s.execute("speed")
+    with pytest.raises(ControlError, match="Wrong number"):
+        s.execute("speed", "1", "2")
+
+    assert run(s, "speed") == "error Wrong number of arguments for speed"
+
+def test_ok():
+    s = server()
+    speed = config.speed
+    try:
+        assert run(s, "speed", "2") == "ok"
+        assert config.speed == 2.0
+    finally:
+        config.speed = speed
+
+def test_internal_error():
+    s = server()
+    def broken(name):
+        return len(None)
+    s.cmd_broken = broken
+
+    with pytest.raises(TypeError):
+        s.execute("broken", "x")
+
+    reply = run(s, "broken", "x")
+    assert reply.startswith("error internal error TypeError")
+    assert "Traceback" in s.outfile.getvalue()
@@ -0,0 +1,35 @@
+from limelights.framebuffer import FrameBuffer, BYTE_PALETTE, SHORT_PALETTE
+
+def test_palette():
+    fb = FrameBuffer(4)
+    fb.apply({ 1: 0xff0000, 2: 0x00ff00, 3: 0xff0000, })
+
+    assert fb.palette == [ 0, 0xff0000, 0x00ff00, ]
+    assert fb.indeces.typecode == "B"
+    assert list(fb.colors) == [ 0, 0xff0000, 0x00ff00, 0xff0000, ]
+
+def test_overflow():
+    size = SHORT_PALETTE + 4464
+    fb = FrameBuffer(size)
+    fb.apply({ i: i+1 for i in range(size) })
+
+    assert fb.palette is None
+    assert fb.indeces.typecode == "I"
+    assert list(fb.colors) == list(range(1, size+1))
+    assert fb[size-1] == size
+
+def test_widen_and_narrow():
+    size = 2 * BYTE_PALETTE
+    fb = FrameBuffer(size)
+    fb.apply({ i: i+1 for i in range(size) })
+
+    assert fb.indeces.typecode == "H"
+    assert list(fb.colors) == list(range(1, size+1))
+
+    # Down to a few colors, the next compaction goes back to bytes.
+    fb.apply({ i: 0xff for i in range(size) })
+    for color in range(BYTE_PALETTE):
+        fb.apply({ 0: 0x10000 + color, })
+
+    assert fb.indeces.typecode == "B"
+    assert list(fb.colors) == [ 0x100ff ] + [ 0xff ] * (size-1)
@@ -0,0 +1,47 @@
+from limelights.basetypes import Changes
+from limelights.engine import Engine
+from limelights.golden import record, first_difference
+from limelights.model import Town, Building, Room
+from limelights.output import OutputStage
+from limelights.strips import DebugPixelStrip
+
+def town_factory():
+    return Town(Building(Room(lightnum=2, color=0x884488), Room()))
+
+class Swap(OutputStage):
+    # Write the first pixel’s color to the second one and vice versa.
+    def process(self, engine, change):
+        ret = Changes([])
+        for idx, color in change.items():
+            ret[1 - idx if idx < 2 else idx] = color
+        return ret
+
+class SwappingEngine(Engine):
+    def __init__(self, town):
+        super().__init__(town)
+        self.output_stages.append(Swap(self.lightcount))
+
+def test_same():
+    engine, a = record(Engine, town_factory, 0, 48)
+    engine, b = record(Engine, town_factory, 0, 48, DebugPixelStrip)
+    assert a.frame_count == 48
+    assert first_difference(a, b) is None
+
+def test_output_stage():
+    engine, a = record(Engine, town_factory, 0, 48)
+    engine, b = record(SwappingEngine, town_factory, 0, 48)
+    assert first_difference(a, b) is None
+
+    class BrokenSwap(Swap):
+        def process(self, engine, change):
+            ret = super().process(engine, change)
+            ret.pop(0, None)
+            return ret
+
+    class BrokenEngine(Engine):
+        def __init__(self, town):
+            super().__init__(town)
+            self.output_stages.append(BrokenSwap(self.lightcount))
+
+    engine, c = record(BrokenEngine, town_factory, 0, 48)
+    assert first_difference(a, c) == ( 0, 0, 0x884488, None, )
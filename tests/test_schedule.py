@@ -0,0 +1,73 @@
+import io, itertools, types
+
+from limelights.engine import Engine
+from limelights.model import Town, Building, Room
+from limelights.schedule import BuildingSchedule
+from limelights.strips import ArrayStrip
+
+def reloaded(old:Building, engine:Engine, hours=None) -> Building:
+    # Make a Building on old’s pixels like limelights.reload does.
+    new = Building(Room(), hours=hours)
+    new.engine_init(types.SimpleNamespace(
+        indeces=itertools.count(min(old.indeces)),
+        call_at=engine.call_at))
+    return new
+
+def setup(hours:str):
+    town = Town(Building(Room()), Building(Room(), hours=hours))
+    engine = Engine(town)
+    clock = types.SimpleNamespace(minute=12*60)
+    schedule = BuildingSchedule(engine, clock=lambda: clock.minute,
+                                outfile=io.StringIO())
+    schedule.install()
+    engine.animate(ArrayStrip(engine.lightcount), frames=2,
+                   realtime=False)
+    return town, engine, schedule, clock
+
+def test_replace_own_hours():
+    town, engine, schedule, clock = setup("10:00-14:00")
+    old = town[1]
+    new = reloaded(old, engine, "10:00-18:00")
+    engine.replace_building(old, new)
+
+    assert town.schedules == [ (new, [ (600, 1080,), ],), ]
+
+    clock.minute = 16*60
+    schedule.check()
+    assert not town.is_suspended(new)
+
+    clock.minute = 20*60
+    schedule.check()
+    assert town.is_suspended(new)
+
+def test_replace_no_hours():
+    town, engine, schedule, clock = setup("10:00-14:00")
+    old = town[1]
+    new = reloaded(old, engine)
+    engine.replace_building(old, new)
+
+    assert town.schedules == []
+
+def test_replace_keeps_override():
+    town, engine, schedule, clock = setup("10:00-14:00")
+    old = town[1]
+    town.schedule(old, "08:00-09:00")
+    new = reloaded(old, engine, "10:00-18:00")
+    engine.replace_building(old, new)
+
+    assert town.schedules == [ (new, [ (480, 540,), ],), ]
+
+def test_replace_suspended():
+    town, engine, schedule, clock = setup("10:00-14:00")
+    clock.minute = 16*60
+    schedule.check()
+    old = town[1]
+    assert town.is_suspended(old)
+
+    new = reloaded(old, engine, "10:00-14:00")
+    engine.replace_building(old, new)
+    assert town.is_suspended(new)
+
+    clock.minute = 12*60
+    schedule.check()
+    assert not town.is_suspended(new)
@@ -0,0 +1,33 @@
+from limelights import config
+from limelights.engine import Engine
+from limelights.heatmap import pixel_rows
+from limelights.model import Town, Building, Room
+from limelights.output import Correction, town_calibration
+from limelights.simulation import Simulation
+
+def simulate(town:Town) -> Simulation:
+    engine = Engine(town)
+    simulation = Simulation(engine, channel=20.0, idle=1.0,
+                            calibration=town_calibration(town,
+                                                         engine.lightcount))
+    simulation.run(60 * config.framerate)
+    return simulation
+
+def test_corrected():
+    room = Room(lightnum=2, color=0x884488,
+                correction=Correction(brightness=.5))
+    simulation = simulate(Town(Building(room)))
+
+    state, = simulation.states.values()
+    segment = state.segments[0]
+    assert segment.colors == [ 0x442244 ]
+    assert segment.current == 1.0 + 20.0 * (0x44 + 0x22 + 0x44) / 255
+
+    rows = pixel_rows(simulation, 4)
+    assert list(rows[0]) == [ 0x442244 ] * 4
+
+def test_uncorrected():
+    simulation = simulate(Town(Building(Room(color=0x884488))))
+
+    state, = simulation.states.values()
+    assert state.segments[0].colors == [ 0x884488 ]
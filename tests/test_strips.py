@@ -0,0 +1,66 @@
+import array
+
+from limelights.basetypes import Change
+from limelights.output import frame_change
+from limelights.strips import ArrayStrip, CountingStrip
+
+def change(colors:dict) -> Change:
+    ret = Change(*colors.popitem())
+    ret.update(colors)
+    return ret
+
+def test_runs():
+    c = change({ 7: 0x3, 2: 0x1, 3: 0x2, 9: 0x4, })
+    assert c.runs() == [ ( 2, [ 0x1, 0x2, ], ),
+                         ( 7, [ 0x3, ], ),
+                         ( 9, [ 0x4, ], ), ]
+
+def test_write_ranges():
+    strip = CountingStrip(10)
+    strip.write_ranges([ ( 2, [ 0x1, 0x2, ], ), ( 7, [ 0x3, ], ), ])
+
+    assert list(strip.colors) == [ 0, 0, 0x1, 0x2, 0, 0, 0, 0x3, 0, 0, ]
+    assert strip.calls == 2
+    assert strip.pixels == 3
+    assert strip.bytes == 9
+
+def test_write_frame():
+    strip = CountingStrip(4)
+    strip.write_frame(array.array("I", [ 0x1, 0x2, 0x3, ]))
+
+    assert list(strip.colors) == [ 0x1, 0x2, 0x3, 0, ]
+    assert strip.calls == 1
+    assert strip.pixels == 3
+
+def test_apply_runs():
+    strip = CountingStrip(10)
+    change({ 5: 0xff0000, 4: 0x00ff00, 8: 0x0000ff, }).apply_to(strip)
+
+    assert strip[4] == 0x00ff00
+    assert strip[5] == 0xff0000
+    assert strip[8] == 0x0000ff
+    assert strip.calls == 2
+    assert strip.pixels == 3
+
+def test_apply_frame():
+    strip = CountingStrip(3)
+    frame_change(array.array("I", [ 0x1, 0x2, 0x3, ])).apply_to(strip)
+
+    assert list(strip.colors) == [ 0x1, 0x2, 0x3, ]
+    assert strip.calls == 1
+    assert strip.pixels == 3
+
+def test_apply_pixels():
+    strip = ArrayStrip(10)
+    change({ 5: 0xff0000, 4: 0x00ff00, 8: 0x0000ff, }).apply_to(strip)
+
+    assert list(strip.colors) == [ 0, 0, 0, 0, 0x00ff00, 0xff0000,
+                                   0, 0, 0x0000ff, 0, ]
+
+def test_apply_nothing():
+    strip = CountingStrip(3)
+    c = change({ 0: 0x1, })
+    c.clear()
+    c.apply_to(strip)
+
+    assert strip.calls == 0